@@ -7,6 +7,9 @@ import argparse
 from decimal import *
 getcontext().prec = 4
 from argparse import ArgumentParser
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import read_counts
+import read_counts
 
 ##Makes pre- and post-filtering QC outputs
 ##Usage: >python3 FastP_QC.py paired_fastp.json single_fastp_json Isolate_Name
@@ -62,9 +65,8 @@ def FastP_QC_before(input_json, output_file, name):
     Out.close()
 
 def FastP_QC_after(input_trimmed_json, input_singles_json, output_file, name):
-    """Makes a QC output file from an input FastP json for orphaned reads"""
-    Out = open(output_file, 'w')
-    Out.write('Name\tR1[reads]\tR1[bp]\tR2[reads]\tR2[bp]\tUnpaired[reads]\tUnpaired[bps]\tQ20_Total_[bp]\tQ30_Total_[bp]\tQ20_R1_[bp]\tQ20_R2_[bp]\tQ20_unpaired[bp]\tQ20_R1_[%]\tQ20_R2_[%]\tQ20_unpaired[%]\tQ30_R1_[bp]\tQ30_R2_[bp]\tQ30_unpaired[bp]\tQ30_R1_[%]\tQ30_R2_[%]\tQ30_unpaired[%]\tTotal_Sequenced_[bp]\tPaired_Sequenced_[reads]\tTotal_Sequenced_[reads]\n')
+    """Makes a QC output file, and the .json of it, from an input FastP json for orphaned reads"""
+    columns = ['Name', 'R1[reads]', 'R1[bp]', 'R2[reads]', 'R2[bp]', 'Unpaired[reads]', 'Unpaired[bps]', 'Q20_Total_[bp]', 'Q30_Total_[bp]', 'Q20_R1_[bp]', 'Q20_R2_[bp]', 'Q20_unpaired[bp]', 'Q20_R1_[%]', 'Q20_R2_[%]', 'Q20_unpaired[%]', 'Q30_R1_[bp]', 'Q30_R2_[bp]', 'Q30_unpaired[bp]', 'Q30_R1_[%]', 'Q30_R2_[%]', 'Q30_unpaired[%]', 'Total_Sequenced_[bp]', 'Paired_Sequenced_[reads]', 'Total_Sequenced_[reads]']
     f = open(input_trimmed_json)
     data = json.load(f)
     f.close()
@@ -115,9 +117,8 @@ def FastP_QC_after(input_trimmed_json, input_singles_json, output_file, name):
     Q20_Total = str(int(Q20_Total_trimmed) + int(Q20_Total_singles))
     Q30_Total = str(int(Q30_Total_trimmed) + int(Q30_Total_singles))
 
-    Line = name + '\t' + raw_R1_reads + '\t' + raw_R1_bases + '\t' + raw_R2_reads + '\t' + raw_R2_bases + '\t' + unpaired_reads + '\t' + unpaired_bases + '\t' + Q20_Total + '\t' + Q30_Total + '\t' + Q20_R1_bp + '\t' + Q20_R2_bp + '\t' + Q20_Total_singles + '\t' + Q20_R1_percent + '\t' + Q20_R2_percent + '\t' + Q20_unpaired_percent + '\t' + Q30_R1_bp + '\t' + Q30_R2_bp + '\t' + Q30_Total_singles + '\t' + Q30_R1_percent + '\t' + Q30_R2_percent + '\t' + Q30_unpaired_percent + '\t' + Total_Sequenced_bp + '\t' + Trimmed_Sequenced_reads + '\t' + Total_Sequenced_reads
-    Out.write(Line)
-    Out.close()
+    values = [name, raw_R1_reads, raw_R1_bases, raw_R2_reads, raw_R2_bases, unpaired_reads, unpaired_bases, Q20_Total, Q30_Total, Q20_R1_bp, Q20_R2_bp, Q20_Total_singles, Q20_R1_percent, Q20_R2_percent, Q20_unpaired_percent, Q30_R1_bp, Q30_R2_bp, Q30_Total_singles, Q30_R1_percent, Q30_R2_percent, Q30_unpaired_percent, Total_Sequenced_bp, Trimmed_Sequenced_reads, Total_Sequenced_reads]
+    read_counts.write_counts(output_file, columns, values)
 
 def FastP_QC_All(input_paired_json, input_singles_json, name):
     """Makes a pre- and post-filtering output of trimmed info"""
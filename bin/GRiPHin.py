@@ -13,8 +13,16 @@ import operator
 import xlsxwriter as ws
 from xlsxwriter.utility import xl_rowcol_to_cell
 import csv
-from Bio import SeqIO
+import json
+import sqlite3
 from itertools import chain
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import ar_dictionary
+from ar_dictionary import make_ar_dictionary
+import read_counts
+from excel_rows import write_df_header, write_df_rows
 
 ##Makes a summary Excel file when given a series of output summary line files from PhoeNiX
 ##Usage: >python GRiPHin.py -s ./samplesheet.csv -a ResGANNCBI_20220915_srst2.fasta -c control_file.csv -o output --phoenix --scaffolds
@@ -34,6 +42,10 @@ def parseArgs(args=None):
     parser.add_argument('--coverage', default=30, required=False, dest='set_coverage', help='The coverage cut off default is 30x.')
     parser.add_argument('--scaffolds', dest="scaffolds", default=False, action='store_true', help='Turn on with --scaffolds to keep samples from failing/warnings/alerts that are based on trimmed data. Default is off.')
     parser.add_argument('--phoenix', dest="phoenix", default=False, action='store_true', required=False, help='Use for -entry PHOENIX rather than CDC_PHOENIX, which is the default.')
+    parser.add_argument('--tsv_only', dest="tsv_only", default=False, action='store_true', required=False, help='Only write the tsv summary and skip making the excel file. Default is off.')
+    parser.add_argument('--cache', default=None, required=False, dest='cache', help='SQLite file to keep parsed metrics per sample (as json). Samples whose files have not changed since the last run are not parsed again.')
+    parser.add_argument('--threads', default=1, type=int, required=False, dest='threads', help='Number of processes used to parse samples in parallel. Default is 1 (serial).')
+    parser.add_argument('--low_memory', dest="low_memory", default=False, action='store_true', required=False, help='Write the excel file a row at a time with xlsxwriter constant_memory mode, so memory use stays flat for large reports. Default is off.')
     parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
     return parser.parse_args()
 
@@ -57,30 +69,20 @@ def Get_Parent_Folder(directory):
     #parent_folder = os.path.split(cemb_path)[1].lstrip("/") # remove backslash on left side to make it clean  #this is only the last name of the folder not full path
     return project, parent_folder
 
-def make_ar_dictionary(ar_db):
-    seq_id_list = []
-    ar_dic = {}
-    for seq_record in SeqIO.parse(ar_db, "fasta"):
-        seq_id_list.append(seq_record.id)
-    gene_name_list = [seq_id.split("__")[2] for seq_id in seq_id_list]
-    drug_list = [seq_id.split("__")[4]  for seq_id in seq_id_list]
-    ar_dic = dict(zip(gene_name_list, drug_list))
-    return ar_dic
-
 def get_Q30(trim_stats, raw_stats):
-    # trimmed data
-    data_df = pd.read_csv(trim_stats, sep='\t', header=0)
-    Trim_Q30_R1_percent = round(data_df["Q30_R1_[%]"]*100, 2)[0] #make percent and round to two decimals
-    Trim_Q30_R2_percent = round(data_df["Q30_R2_[%]"]*100, 2)[0]
-    Total_Trimmed_bp = data_df["Total_Sequenced_[bp]"][0]
-    Total_Trimmed_reads = data_df["Total_Sequenced_[reads]"][0]
-    Paired_Trimmed_reads = data_df["Paired_Sequenced_[reads]"][0]
+    # trimmed data, from the .json next to the file when FastP_QC.py made one so there is no csv to parse
+    trim_counts = read_counts.read_counts(trim_stats)
+    Trim_Q30_R1_percent = np.round(trim_counts["Q30_R1_[%]"]*100, 2) #make percent and round to two decimals
+    Trim_Q30_R2_percent = np.round(trim_counts["Q30_R2_[%]"]*100, 2)
+    Total_Trimmed_bp = trim_counts["Total_Sequenced_[bp]"]
+    Total_Trimmed_reads = trim_counts["Total_Sequenced_[reads]"]
+    Paired_Trimmed_reads = trim_counts["Paired_Sequenced_[reads]"]
     #do the same with raw
-    data_raw_df = pd.read_csv(raw_stats, sep='\t', header=0)
-    Q30_R1_percent = round(data_raw_df["Q30_R1_[%]"]*100, 2)[0] #make percent and round to two decimals
-    Q30_R2_percent = round(data_raw_df["Q30_R2_[%]"]*100, 2)[0]
-    Total_Raw_bp = data_raw_df["Total_Sequenced_[bp]"][0]
-    Total_Raw_reads = data_raw_df["Total_Sequenced_[reads]"][0]
+    raw_counts = read_counts.read_counts(raw_stats)
+    Q30_R1_percent = np.round(raw_counts["Q30_R1_[%]"]*100, 2) #make percent and round to two decimals
+    Q30_R2_percent = np.round(raw_counts["Q30_R2_[%]"]*100, 2)
+    Total_Raw_bp = raw_counts["Total_Sequenced_[bp]"]
+    Total_Raw_reads = raw_counts["Total_Sequenced_[reads]"]
     return Q30_R1_percent, Q30_R2_percent, Total_Raw_bp, Total_Raw_reads, Total_Trimmed_bp, Paired_Trimmed_reads, Total_Trimmed_reads, Trim_Q30_R1_percent, Trim_Q30_R2_percent
 
 def get_kraken_info(kraken_trim, kraken_wtasmbld, sample_name):
@@ -443,142 +445,121 @@ def Checking_auto_pass_fail(fairy_file, scaffolds_entry, coverage, length, assem
         QC_result = "PASS"
     return QC_result, QC_reason
 
-def duplicate_column_clean(df):
-    if len([x for x in list(df.columns) if list(df.columns).count(x) > 1]) > 0:
-        #get column names that are duplicates
-        dups = set([x for x in list(df.columns) if list(df.columns).count(x) > 1])
-        # get dataframe for duplicate columns
-        for dup in dups:
-            new_col = df[dup].agg(';'.join, axis=1).astype(str).values[0]
-            #drop old frame(s)
-            df = df.drop(dup, axis=1)
-            #add in new frame
-            df[dup] = new_col
+def make_gene_row(column_names, coverage):
+    """Collect one sample's gene hits as a {gene: code} dict. Multiple hits to the same gene are joined with ';'."""
+    row = {}
+    for column, code in zip(column_names, coverage):
+        if column in row:
+            row[column] = row[column] + ";" + code
+        else:
+            row[column] = code
+    return row
+
+def build_gene_df(gene_rows):
+    """Build the wide sample x gene dataframe once from the list of per-sample gene rows, rather than concatenating for every sample.
+    Most cells are empty so each gene column is a categorical, a small integer code per sample pointing to that gene's hit strings, rather than dense strings."""
+    if len(gene_rows) == 0:
+        return pd.DataFrame()
+    sample_names = [row["WGS_ID"] for row in gene_rows]
+    # gene dictionary of {gene: {row number: hit}}, only cells with something in them
+    genes = {}
+    for row_number, row in enumerate(gene_rows):
+        for gene, hit in row.items():
+            if gene != "WGS_ID":
+                genes.setdefault(gene, {})[row_number] = hit
+    columns = {}
+    # same column order and blanks as pd.concat(..., sort=True).fillna("")
+    for gene in sorted(list(genes) + ["WGS_ID"]):
+        if gene == "WGS_ID":
+            columns[gene] = sample_names
+        else:
+            hits = genes[gene]
+            categories = [""] + sorted(set(hits.values()) - {""}) # code 0 is the blank cell
+            code_lookup = { hit: code for code, hit in enumerate(categories) }
+            codes = np.zeros(len(gene_rows), dtype=np.int8 if len(categories) <= np.iinfo(np.int8).max else np.int32) # int8 unless a gene has more hits than fit
+            for row_number, hit in hits.items():
+                codes[row_number] = code_lookup[hit]
+            columns[gene] = pd.Categorical.from_codes(codes, categories)
+    return pd.DataFrame(columns, index=sample_names)
+
+def densify(df):
+    """Turn the categorical gene columns back into plain strings for writing the excel and tsv files."""
+    for col in df.select_dtypes(include="category").columns:
+        df[col] = df[col].astype(object)
     return df
 
-def parse_gamma_ar(gamma_ar_file, sample_name, final_df):
+def parse_gamma_ar(gamma_ar_file, sample_name):
     """Parsing the gamma file run on the antibiotic resistance database."""
     gamma_df = pd.read_csv(gamma_ar_file, sep='\t', header=0)
     DB = (gamma_ar_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[1] + "_" + (gamma_ar_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[2] + "([XNT/98AA/90]G:[98NT/90]S)"
-    percent_BP_IDs = np.floor(gamma_df["BP_Percent"]*100).tolist() # round % to whole number
-    percent_codon_IDs = np.floor(gamma_df["Codon_Percent"]*100).tolist() # round % to whole number
-    percent_lengths = np.floor(gamma_df["Percent_Length"]*100).tolist() # round % to whole number
+    percent_BP_IDs = np.floor(gamma_df["BP_Percent"]*100) # round % to whole number
+    percent_codon_IDs = np.floor(gamma_df["Codon_Percent"]*100) # round % to whole number
+    percent_lengths = np.floor(gamma_df["Percent_Length"]*100) # round % to whole number
+    # Minimum % length (90) and % identity (98) required to be included in report, otherwise removed
+    keep = (percent_lengths >= 90) & (percent_codon_IDs >= 98)
+    gamma_df = gamma_df[keep]
     conferred_resistances = gamma_df["Gene"].str.split("__").str[4] #parse "Gene" column in gamma file to get conferred resistance out of gene name
     contig_numbers = gamma_df["Contig"].str.replace(sample_name, "").str.split("_").str[1] #Parse "Contig" column in gamma file
     genes = gamma_df["Gene"].str.split("__").str[2] #Parse "Gene" column in gamma file to get gene name and accession
-    # loop through list of genes to combine with conferred resistance and make back into a pandas series
-    column_name = ["{}_({})".format(gene, conferred_resistance) for gene, conferred_resistance in zip(genes, conferred_resistances)]
-    # loop through list of gamma info to combine into "code" for ID%/%cov:contig# and make back into a pandas series
-    coverage = ["[{:.0f}NT/{:.0f}AA/{:.0f}:#{}]G".format(percent_BP_ID, percent_codon_ID, percent_length, contig_number) for percent_BP_ID, percent_codon_ID, percent_length, contig_number in zip(percent_BP_IDs, percent_codon_IDs, percent_lengths, contig_numbers)]
-    # Minimum % length required to be included in report, otherwise removed from list
-    if bool([percent_length for percent_length in percent_lengths if int(percent_length) < 90]): 
-        index_remove_postion = [ n for n,percent_length in enumerate(percent_lengths) if int(percent_length) < 90 ] # get index for value removed to remove from other lists (values less than 90)
-        percent_lengths = [percent_length for percent_length in percent_lengths if int(percent_length) >= 90] # filter list to remove values below cutoff (keep those greater than or equal to 90)
-        for index in sorted(index_remove_postion, reverse=True):
-            del coverage[index]
-            del column_name[index]
-            del percent_codon_IDs[index]
-    # Minimum % identity required to be included in report, otherwise removed from list
-    if bool([percent_codon_ID for percent_codon_ID in percent_codon_IDs if int(percent_codon_ID) < 98]):
-        index_remove_postion = [ n for n,percent_codon_ID in enumerate(percent_codon_IDs) if int(percent_codon_ID) < 98 ] # get index for value removed to remove from other lists (values less than 98)
-        percent_codon_IDs = [percent_codon_ID for percent_codon_ID in percent_codon_IDs if int(percent_codon_ID) >= 98] # filter list to remove values below cutoff (keep those greater than or equal to 98)
-        #loop through list of indexes to delete and remove them from the other lists so they all match
-        for index in sorted(index_remove_postion, reverse=True):
-            del coverage[index]
-            del column_name[index]
-            del percent_lengths[index]
-    #building a new dataframe - create giant row
-    df = pd.DataFrame(coverage).T
-    if df.empty:
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'AR_Database':[DB], 'No_AR_Genes_Found':['[-/-]'] })
-        df.index = [sample_name]
+    # combine genes with conferred resistance for the column names
+    column_name = list(map("{}_({})".format, genes, conferred_resistances))
+    # combine gamma info into "code" for ID%/%cov:contig#
+    coverage = list(map("[{:.0f}NT/{:.0f}AA/{:.0f}:#{}]G".format, percent_BP_IDs[keep].tolist(), percent_codon_IDs[keep].tolist(), percent_lengths[keep].tolist(), contig_numbers))
+    #building the row for this sample, multiple hits to the same gene are combined
+    if len(coverage) == 0:
+        row = {'WGS_ID':sample_name, 'AR_Database':DB, 'No_AR_Genes_Found':'[-/-]'}
     else:
-        df.columns = column_name # add column names
-        df["WGS_ID"] = sample_name
-        df["AR_Database"] = DB
-        df["No_AR_Genes_Found"] = ""
-        df.index = [sample_name]
-    # Check for duplicate column names, multiple hits 
-    #print(df["blaFOX-5_NG_049105.1(beta-lactam)"])
-    df = duplicate_column_clean(df)
-    final_df = pd.concat([final_df, df], axis=0, sort=True, ignore_index=False).fillna("")
-    #print(final_df["mph(D)_NC_017312(macrolide_lincosamide_streptogramin)"])
-    return final_df
+        row = make_gene_row(column_name, coverage)
+        row["WGS_ID"] = sample_name
+        row["AR_Database"] = DB
+        row["No_AR_Genes_Found"] = ""
+    return row
 
-def parse_gamma_hv(gamma_hv_file, sample_name, final_df):
+def parse_gamma_hv(gamma_hv_file, sample_name):
     """Parsing the gamma file run on the antibiotic resistance database."""
     gamma_df = pd.read_csv(gamma_hv_file, sep='\t', header=0)
     DB = (gamma_hv_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[1] + "_" + (gamma_hv_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[2].strip(".gamma")
-    percent_BP_IDs = np.floor(gamma_df["BP_Percent"]*100).tolist() # round % to whole number
-    percent_codon_IDs = np.floor(gamma_df["Codon_Percent"]*100).tolist() # round % to whole number
-    percent_lengths = np.floor(gamma_df["Percent_Length"]*100).tolist() # round % to whole number
-    conferred_resistances = gamma_df["Gene"].str.split("__").str[4] #parse "Gene" column in gamma file to get conferred resistance out of gene name
+    percent_BP_IDs = np.floor(gamma_df["BP_Percent"]*100) # round % to whole number
+    percent_codon_IDs = np.floor(gamma_df["Codon_Percent"]*100) # round % to whole number
+    percent_lengths = np.floor(gamma_df["Percent_Length"]*100) # round % to whole number
     contig_numbers = gamma_df["Contig"].str.replace(sample_name, "").str.split("_").str[1] #Parse "Contig" column in gamma file
     hv_column_name = gamma_df["Gene"] #Parse "Gene" column in gamma file to get gene name and accession
-    # loop through list of gamma info to combine into "code" for ID%/%cov:contig# and make back into a pandas series
-    coverage = ["[{:.0f}NT/{:.0f}AA/{:.0f}:#{}]G".format(percent_BP_ID, percent_codon_ID, percent_length, contig_number) for percent_BP_ID, percent_codon_ID, percent_length, contig_number in zip(percent_BP_IDs, percent_codon_IDs, percent_lengths, contig_numbers)]
-    #building a new dataframe - create giant row
-    df = pd.DataFrame(coverage).T
-    if df.empty:
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'HV_Database':[DB], 'No_HVGs_Found':['[-/-]'] })
-        df.index = [sample_name]
+    # combine gamma info into "code" for ID%/%cov:contig#
+    coverage = list(map("[{:.0f}NT/{:.0f}AA/{:.0f}:#{}]G".format, percent_BP_IDs.tolist(), percent_codon_IDs.tolist(), percent_lengths.tolist(), contig_numbers))
+    #building the row for this sample, multiple hits to the same gene are combined
+    if len(coverage) == 0:
+        row = {'WGS_ID':sample_name, 'HV_Database':DB, 'No_HVGs_Found':'[-/-]'}
     else:
-        df.columns = hv_column_name # add column names
-        df["WGS_ID"] = sample_name
-        df["HV_Database"] = DB
-        df["No_HVGs_Found"] = ""
-        df.index = [sample_name]
-    # Check for duplicate column names
-    df = duplicate_column_clean(df)
-    final_df = pd.concat([final_df, df], axis=0, sort=True, ignore_index=False).fillna("")
-    return final_df
+        row = make_gene_row(hv_column_name, coverage)
+        row["WGS_ID"] = sample_name
+        row["HV_Database"] = DB
+        row["No_HVGs_Found"] = ""
+    return row
 
-def parse_gamma_pf(gamma_pf_file, sample_name, pf_df):
+def parse_gamma_pf(gamma_pf_file, sample_name):
     """Parsing the gamma file run on the plasmid marker database."""
     gamma_df = pd.read_csv(gamma_pf_file, sep='\t', header=0)
     DB = (gamma_pf_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[1] + "_" + (gamma_pf_file.rsplit('/', 1)[-1]).replace(sample_name, "").rsplit('_')[2].strip(".gamma") + "([95NT/60]) "
     if DB == "":
         DB ="Unknown"
-    percent_NT_IDs = np.floor(gamma_df["Match_Percent"]*100).tolist() # round % to whole number
-    percent_lengths = np.floor(gamma_df["Length_Percent"]*100).tolist() # round % to whole number - this is the coverage
+    percent_NT_IDs = np.floor(gamma_df["Match_Percent"]*100) # round % to whole number
+    percent_lengths = np.floor(gamma_df["Length_Percent"]*100) # round % to whole number - this is the coverage
+    # Minimum % length (60) and % identity (95) required to be included in report, otherwise removed
+    keep = (percent_lengths >= 60) & (percent_NT_IDs >= 95)
+    gamma_df = gamma_df[keep]
     contig_numbers = gamma_df["Contig"].str.replace(sample_name, "").str.split("_").str[1] #Parse "Contig" column in gamma file
     pf_column_name = gamma_df["Gene"] #Parse "Gene" column in gamma file to get gene name and accession
-    # loop through list of gamma info to combine into "code" for ID%/%cov:contig# and make back into a pandas series
-    pf_coverage = ["[{:.0f}NT/{:.0f}:#{}]G".format(percent_NT_ID, percent_length, contig_number) for percent_NT_ID, percent_length, contig_number in zip(percent_NT_IDs, percent_lengths, contig_numbers)]
-    # Minimum % length required to be included in report, otherwise removed from list
-    if bool([percent_length for percent_length in percent_lengths if int(percent_length) < 60]): 
-        index_remove_postion = [ n for n,percent_length in enumerate(percent_lengths) if int(percent_length) < 60 ] # get index for value removed to remove from other lists (values less than 90)
-        percent_lengths = [percent_length for percent_length in percent_lengths if int(percent_length) >= 60] # filter list to remove values below cutoff (keep those greater than or equal to 90)
-        for index in sorted(index_remove_postion, reverse=True): #delete them in reverse order so that you don't throw off the subsequent indexes.
-            del pf_coverage[index]
-            del pf_column_name[index]
-            del percent_NT_IDs[index]
-    # Minimum % identity required to be included in report, otherwise removed from list
-    if bool([percent_NT_ID for percent_NT_ID in percent_NT_IDs if int(percent_NT_ID) < 95]):
-        index_remove_postion = [ n for n,percent_NT_ID in enumerate(percent_NT_IDs) if int(percent_NT_ID) < 95 ] # get index for value removed to remove from other lists (values less than 98)
-        percent_NT_IDs = [percent_NT_ID for percent_NT_ID in percent_NT_IDs if int(percent_NT_ID) >= 95] # filter list to remove values below cutoff (keep those greater than or equal to 98)
-        #reset indexes as if you deleted rows in the if loop above the index values will be off from index_remove_postion 
-        pf_column_name.reset_index(drop=True, inplace=True)
-        #loop through list of indexes to delete and remove them from the other lists so they all match
-        for index in sorted(index_remove_postion, reverse=True): #delete them in reverse order so that you don't throw off the subsequent indexes.
-            del pf_coverage[index]
-            del pf_column_name[index]
-            del percent_lengths[index]
-    #building a new dataframe - create giant row
-    df = pd.DataFrame(pf_coverage).T
-    if df.empty:
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'Plasmid_Replicon_Database':[DB], 'No_Plasmid_Markers':['[-/-]'] })
-        df.index = [sample_name]
+    # combine gamma info into "code" for ID%/%cov:contig#
+    pf_coverage = list(map("[{:.0f}NT/{:.0f}:#{}]G".format, percent_NT_IDs[keep].tolist(), percent_lengths[keep].tolist(), contig_numbers))
+    #building the row for this sample, multiple hits to the same gene are combined
+    if len(pf_coverage) == 0:
+        row = {'WGS_ID':sample_name, 'Plasmid_Replicon_Database':DB, 'No_Plasmid_Markers':'[-/-]'}
     else:
-        df.columns = pf_column_name # add column 'HV_Database':[DB], names
-        df["WGS_ID"] = sample_name
-        df["Plasmid_Replicon_Database"] = DB
-        df['No_Plasmid_Markers'] = ""
-        df.index = [sample_name]
-    # Check for duplicate column names
-    df = duplicate_column_clean(df)
-    pf_df = pd.concat([pf_df, df], axis=0, sort=True, ignore_index=False).fillna("")
-    return pf_df
+        row = make_gene_row(pf_column_name, pf_coverage)
+        row["WGS_ID"] = sample_name
+        row["Plasmid_Replicon_Database"] = DB
+        row['No_Plasmid_Markers'] = ""
+    return row
 
 def parse_mlst(mlst_file, scheme_guess, sample_name):
     """Pulls MLST info from *_combined.tsv file."""
@@ -658,50 +639,30 @@ def parse_ani(fast_ani_file):
         scheme_guess = organism.split(' ')[0][0].lower() + organism.split(' ')[1][0:4]
     return FastANI_output_list, scheme_guess, fastani_warning
 
-def parse_srst2_ar(srst2_file, ar_dic, final_srst2_df, sample_name):
+def parse_srst2_ar(srst2_file, ar_dic, sample_name):
     """Parsing the srst2 file run on the ar gene database."""
     srst2_df = pd.read_csv(srst2_file, sep='\t', header=0)
-    percent_lengths = np.floor(srst2_df["coverage"]).tolist()
-    genes = srst2_df["allele"].tolist()
-    percent_BP_IDs = np.floor(100 - srst2_df["divergence"]).tolist()
+    percent_lengths = np.floor(srst2_df["coverage"]) # round % to whole number
+    percent_BP_IDs = np.floor(100 - srst2_df["divergence"]) # round % to whole number
+    # Minimum % length (90) and % identity (98) required to be included in report, otherwise removed
+    keep = (percent_lengths >= 90) & (percent_BP_IDs >= 98)
+    srst2_df = srst2_df[keep]
     # Since srst2 currently doesn't handle () in the gene names we will make a quick detour to fix this... now fixing annotations
     #srst2_df.annotation = srst2_df.annotation.fillna(srst2_df.allele.map(ar_dic)) # this only fills in nas
-    srst2_df['conferred_resistances'] = srst2_df['allele'].map(ar_dic)
-    conferred_resistances = srst2_df['conferred_resistances'].tolist()
-    # loop through list of genes to combine with conferred resistance and make back into a pandas series
-    column_name = ["{}_({})".format(gene, conferred_resistance) for gene, conferred_resistance in zip(genes, conferred_resistances)]
-    # loop through list of srst2 info to combine into "code" for ID%/%cov:contig# and make back into a pandas series
-    coverage = ["[{:.0f}NT/{:.0f}]S".format(percent_BP_ID, percent_length) for percent_BP_ID, percent_length in zip(percent_BP_IDs, percent_lengths)]
-    # Minimum % length required to be included in report, otherwise removed from list
-    if bool([percent_length for percent_length in percent_lengths if int(percent_length) < 90]): 
-        index_remove_postion = [ n for n,percent_length in enumerate(percent_lengths) if int(percent_length) < 90 ] # get index for value removed to remove from other lists (values less than 90)
-        percent_lengths = [percent_length for percent_length in percent_lengths if int(percent_length) >= 90] # filter list to remove values below cutoff (keep those greater than or equal to 90)
-        for index in sorted(index_remove_postion, reverse=True):
-            del coverage[index]
-            del column_name[index]
-            del percent_codon_IDs[index]
-    # Minimum % identity required to be included in report, otherwise removed from list
-    if bool([percent_BP_ID for percent_BP_ID in percent_BP_IDs if int(percent_BP_ID) < 98]):
-        index_remove_postion = [ n for n,percent_BP_ID in enumerate(percent_BP_IDs) if int(percent_BP_ID) < 98 ] # get index for value removed to remove from other lists (values less than 98)
-        percent_BP_IDs = [percent_BP_ID for percent_BP_ID in percent_BP_IDs if int(percent_BP_ID) >= 98] # filter list to remove values below cutoff (keep those greater than or equal to 98)
-        #loop through list of indexes to delete and remove them from the other lists so they all match
-        for index in sorted(index_remove_postion, reverse=True):
-            del coverage[index]
-            del column_name[index]
-            del percent_lengths[index]
-    #building a new dataframe - create giant row
-    df = pd.DataFrame(coverage).T
-    if df.empty: #check if its empty - which would be when nothing is found and/or no hits passed the filter
-        df = pd.DataFrame({'WGS_ID':[sample_name]})
-        df.index = [sample_name]
+    conferred_resistances = srst2_df['allele'].map(ar_dic)
+    # combine genes with conferred resistance for the column names
+    column_name = list(map("{}_({})".format, srst2_df["allele"], conferred_resistances))
+    # combine srst2 info into "code" for ID%/%cov
+    coverage = list(map("[{:.0f}NT/{:.0f}]S".format, percent_BP_IDs[keep].tolist(), percent_lengths[keep].tolist()))
+    #building the row for this sample
+    if len(coverage) == 0: #check if its empty - which would be when nothing is found and/or no hits passed the filter
+        row = {'WGS_ID':sample_name}
     else:
-        df.columns = column_name # add column names
-        df["WGS_ID"] = sample_name
-        df.index = [sample_name]
-    final_srst2_df = pd.concat([final_srst2_df, df], axis=0, sort=True, ignore_index=False).fillna("")
-    return final_srst2_df
+        row = make_gene_row(column_name, coverage)
+        row["WGS_ID"] = sample_name
+    return row
 
-def Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, srst2_ar_df, pf_df, ar_df, hv_df, trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, busco_short_summary, asmbld_ratio, gc_file, sample_name, mlst_file, fairy_file, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file, ar_dic):
+def Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, busco_short_summary, asmbld_ratio, gc_file, sample_name, mlst_file, fairy_file, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file, ar_dic):
     '''For each step to gather metrics try to find the file and if not then make all variables unknown'''
     try:
         Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Raw_reads, Total_Trimmed_bp, Paired_Trimmed_reads, Total_Trimmed_reads, Trim_Q30_R1_percent, Trim_Q30_R2_percent = get_Q30(trim_stats, raw_stats)
@@ -758,26 +719,20 @@ def Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, srst2_ar_df, pf_df
         FastANI_output_list = [ani_source_file, fastani_ID, fastani_coverage, fastani_organism]
         scheme_guess_fastani = ""
     try:
-        ar_df = parse_gamma_ar(gamma_ar_file, sample_name, ar_df)
+        ar_row = parse_gamma_ar(gamma_ar_file, sample_name)
     except FileNotFoundError: 
         print("Warning: Gamma file for ar database on " + sample_name + " not found")
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'No_AR_Genes_Found':['File not found'], 'AR_Database':['GAMMA file not found'] })
-        df.index = [sample_name]
-        ar_df = pd.concat([ar_df, df], axis=0, sort=True, ignore_index=False).fillna("")
+        ar_row = {'WGS_ID':sample_name, 'No_AR_Genes_Found':'File not found', 'AR_Database':'GAMMA file not found'}
     try:
-        pf_df = parse_gamma_pf(gamma_pf_file, sample_name, pf_df)
+        pf_row = parse_gamma_pf(gamma_pf_file, sample_name)
     except FileNotFoundError: 
         print("Warning: Gamma file for pf database on " + sample_name + " not found")
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'No_Plasmid_Markers':['File not found'], 'Plasmid_Replicon_Database':['GAMMA file not found'] })
-        df.index = [sample_name]
-        pf_df = pd.concat([pf_df, df], axis=0, sort=True, ignore_index=False).fillna("")
+        pf_row = {'WGS_ID':sample_name, 'No_Plasmid_Markers':'File not found', 'Plasmid_Replicon_Database':'GAMMA file not found'}
     try:
-        hv_df = parse_gamma_hv(gamma_hv_file, sample_name, hv_df)
+        hv_row = parse_gamma_hv(gamma_hv_file, sample_name)
     except FileNotFoundError: 
         print("Warning: Gamma file for hv database on " + sample_name + " not found")
-        df = pd.DataFrame({'WGS_ID':[sample_name], 'No_HVGs_Found':['File not found'], 'HV_Database':['GAMMA file not found'] })
-        df.index = [sample_name]
-        hv_df = pd.concat([hv_df, df], axis=0, sort=True, ignore_index=False).fillna("")
+        hv_row = {'WGS_ID':sample_name, 'No_HVGs_Found':'File not found', 'HV_Database':'GAMMA file not found'}
     try:
         #handling for if srst2 quietly failed
         srst2_failure_checks = ["failed gene detection","No AR genes found"]
@@ -788,18 +743,14 @@ def Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, srst2_ar_df, pf_df
                 srst2_warning = None
             else:
                 srst2_warning = "failed srst2 gene detection."
-            df = pd.DataFrame({'WGS_ID':[sample_name]})
-            df.index = [sample_name]
-            srst2_ar_df = pd.concat([srst2_ar_df, df], axis=0, sort=True, ignore_index=False).fillna("")
+            srst2_ar_row = {'WGS_ID':sample_name}
         else:
-            srst2_ar_df = parse_srst2_ar(srst2_file, ar_dic, srst2_ar_df, sample_name)
+            srst2_ar_row = parse_srst2_ar(srst2_file, ar_dic, sample_name)
             srst2_warning = None
     except (FileNotFoundError, pd.errors.EmptyDataError) : # second one for an empty dataframe - srst2 module creates a blank file
         if phoenix_entry == False: #supress warning when srst2 is not run
             print("Warning: " + sample_name + "__fullgenes__ResGANNCBI__*_srst2__results.txt not found")
-        df = pd.DataFrame({'WGS_ID':[sample_name]})
-        df.index = [sample_name]
-        srst2_ar_df = pd.concat([srst2_ar_df, df], axis=0, sort=True, ignore_index=False).fillna("")
+        srst2_ar_row = {'WGS_ID':sample_name}
         srst2_warning = None
     try:
         alerts = compile_alerts(scaffolds_entry, Coverage, assembly_ratio_metrics[1], gc_metrics[0])
@@ -862,13 +813,45 @@ def Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, srst2_ar_df, pf_df
                                     genus, fastani_warning, busco_metrics[1], FastANI_output_list[1], FastANI_output_list[2], srst2_warning)
     except:
         warnings = ""
-    return srst2_ar_df, pf_df, ar_df, hv_df, Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Raw_reads, Paired_Trimmed_reads, Total_Trimmed_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, \
+    return srst2_ar_row, pf_row, ar_row, hv_row, Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Raw_reads, Paired_Trimmed_reads, Total_Trimmed_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, \
     Scaffold_Count, busco_metrics, gc_metrics, assembly_ratio_metrics, QC_result, QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2
 
-def Get_Files(directory, sample_name):
+class DirectoryIndex:
+    '''Lists each folder in a sample directory at most once and answers all file lookups for that sample from memory.'''
+    def __init__(self, directory):
+        self.directory = directory
+        self.listings = {}
+        self.scans = 0 # number of directory listings done, to compare to one glob per file
+        self.top_level = self.list("")
+
+    def list(self, folder):
+        if folder not in self.listings:
+            # skip listing sub folders that are not in the sample directory at all
+            if folder != "" and folder.rstrip("/") not in self.top_level:
+                self.listings[folder] = []
+            else:
+                self.scans = self.scans + 1
+                try:
+                    with os.scandir(os.path.join(self.directory, folder)) as entries:
+                        self.listings[folder] = [ entry.name for entry in entries ]
+                except (FileNotFoundError, NotADirectoryError):
+                    self.listings[folder] = []
+        return self.listings[folder]
+
+    def find(self, folder, prefix, suffix, default):
+        '''Returns the first file in folder named prefix*suffix (same as glob.glob(folder/prefix*suffix)[0]) or the default path if there isn't one.'''
+        for name in self.list(folder):
+            if name.startswith(prefix) and name.endswith(suffix) and len(name) >= len(prefix) + len(suffix):
+                return self.directory + "/" + folder + name
+        return self.directory + "/" + folder + default
+
+def Get_Files(directory, sample_name, index=None):
     '''Create file paths to collect files from sample folder.'''
     # if there is a trailing / remove it
     directory = directory.rstrip('/')
+    # list the sample folders once rather than globbing for each file
+    if index == None:
+        index = DirectoryIndex(directory)
     # create file names
     trim_stats = directory + "/qc_stats/" + sample_name + "_trimmed_read_counts.txt"
     raw_stats = directory + "/raw_stats/" + sample_name + "_raw_read_counts.txt"
@@ -879,42 +862,117 @@ def Get_Files(directory, sample_name):
     quast_report = directory + "/quast/" + sample_name + "_summary.tsv"
     mlst_file = directory + "/mlst/" + sample_name + "_combined.tsv"
     fairy_file = directory + "/file_integrity/" + sample_name + "_summary.txt"
-    # This creates blank files for if no file exists. Varibles will be made into "Unknown" in the Get_Metrics function. Need to only do this for files determined by glob
-    # You only need this for glob because glob will throw an index error if not.
-    try:
-        busco_short_summary =  glob.glob(directory + "/BUSCO/short_summary.specific.*" + sample_name + ".filtered.scaffolds.fa.txt")[0]
-    except IndexError:
-        busco_short_summary =  directory + "/BUSCO/short_summary.specific.blank" + sample_name + ".filtered.scaffolds.fa.txt"
-    try:
-        asmbld_ratio = glob.glob(directory + "/" + sample_name + "_Assembly_ratio_*.txt")[0]
-    except IndexError:
-        asmbld_ratio = directory + "/" + sample_name + "_Assembly_ratio_blank.txt"
-    try:
-        gc = glob.glob(directory + "/" + sample_name + "_GC_content_*.txt")[0]
-    except IndexError:
-        gc = directory + "/" + sample_name + "_GC_content_blank.txt"
-    try:
-        gamma_ar_file = glob.glob(directory + "/gamma_ar/" + sample_name + "_*.gamma")[0]
-    except IndexError:
-        gamma_ar_file = directory + "/gamma_ar/" + sample_name + "_blank.gamma"
+    # This creates blank files for if no file exists. Varibles will be made into "Unknown" in the Get_Metrics function.
+    busco_short_summary = index.find("BUSCO/", "short_summary.specific.", sample_name + ".filtered.scaffolds.fa.txt", "short_summary.specific.blank" + sample_name + ".filtered.scaffolds.fa.txt")
+    asmbld_ratio = index.find("", sample_name + "_Assembly_ratio_", ".txt", sample_name + "_Assembly_ratio_blank.txt")
+    gc = index.find("", sample_name + "_GC_content_", ".txt", sample_name + "_GC_content_blank.txt")
+    gamma_ar_file = index.find("gamma_ar/", sample_name + "_", ".gamma", sample_name + "_blank.gamma")
+    gamma_pf_file = index.find("gamma_pf/", sample_name + "_", ".gamma", sample_name + "_blank.gamma")
+    gamma_hv_file = index.find("gamma_hv/", sample_name + "_", ".gamma", sample_name + "_blank.gamma")
+    fast_ani_file = index.find("ANI/", sample_name + "_REFSEQ_", ".fastANI.txt", sample_name + ".fastANI.txt")
+    tax_file = directory + "/" + sample_name + ".tax" # this file will tell you if kraken2 wtassembly, kraken2 trimmed (reads) or fastani determined the taxa
+    srst2_file = index.find("srst2/", sample_name + "__fullgenes__", "_srst2__results.txt", sample_name + "__fullgenes__blank_srst2__results.txt")
+    return trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, mlst_file, fairy_file, busco_short_summary, asmbld_ratio, gc, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file
+
+def file_signature(files, run_options):
+    '''Size and modification time of each input file for a sample, used to check if cached metrics are still good.'''
+    stats = []
+    for file in files:
+        try:
+            info = os.stat(file)
+            stats.append([file, info.st_size, info.st_mtime_ns])
+        except FileNotFoundError:
+            stats.append([file, None, None])
+    return json.dumps([run_options, stats])
+
+def metrics_to_json(value):
+    '''Turns the parsed metrics of a sample into json for the cache. Tuples, dictionaries and numpy floats are tagged so metrics_from_json gives back the same types.'''
+    if isinstance(value, tuple):
+        return {"tuple": [metrics_to_json(item) for item in value]}
+    elif isinstance(value, list):
+        return [metrics_to_json(item) for item in value]
+    elif isinstance(value, dict):
+        return {"dict": [[metrics_to_json(key), metrics_to_json(item)] for key, item in value.items()]}
+    elif isinstance(value, np.floating):
+        return {"float64": float(value)}
+    elif isinstance(value, np.integer):
+        return {"int64": int(value)}
+    return value
+
+def metrics_from_json(value):
+    '''Undoes metrics_to_json, raises ValueError on anything it didn't write.'''
+    if isinstance(value, list):
+        return [metrics_from_json(item) for item in value]
+    elif isinstance(value, dict):
+        if len(value) != 1:
+            raise ValueError("unknown cache entry")
+        tag, item = next(iter(value.items()))
+        if tag == "tuple":
+            return tuple(metrics_from_json(part) for part in item)
+        elif tag == "dict":
+            return { metrics_from_json(key): metrics_from_json(part) for key, part in item }
+        elif tag == "float64":
+            return np.float64(item)
+        elif tag == "int64":
+            return np.int64(item)
+        raise ValueError("unknown cache entry")
+    return value
+
+def load_cached_metrics(metrics):
+    '''Returns the (data_location, parent_folder, sample_name, metrics) saved for a sample, or None if the entry can't be read (old, foreign or damaged cache) so it is parsed again.'''
     try:
-        gamma_pf_file = glob.glob(directory + "/gamma_pf/" + sample_name + "_*.gamma")[0]
-    except IndexError:
-        gamma_pf_file = directory + "/gamma_pf/" + sample_name + "_blank.gamma"
-    try: 
-        gamma_hv_file = glob.glob(directory + "/gamma_hv/" + sample_name + "_*.gamma")[0]
-    except IndexError:
-        gamma_hv_file = directory + "/gamma_hv/" + sample_name + "_blank.gamma"
+        result = metrics_from_json(json.loads(metrics))
+    except (ValueError, TypeError, KeyError, RecursionError):
+        return None
+    if not isinstance(result, tuple) or len(result) != 4 or not isinstance(result[3], tuple):
+        return None
+    return result
+
+def load_cache(cache_file):
+    '''Reads in the metrics cache as a dictionary of (directory, sample_name): (signature, metrics json).'''
     try:
-        fast_ani_file = glob.glob(directory + "/ANI/" + sample_name + "_REFSEQ_*.fastANI.txt")[0]
-    except IndexError:
-        fast_ani_file = directory + "/ANI/" + sample_name + ".fastANI.txt"
-    tax_file = directory + "/" + sample_name + ".tax" # this file will tell you if kraken2 wtassembly, kraken2 trimmed (reads) or fastani determined the taxa
+        connection = sqlite3.connect(cache_file)
+        connection.execute("CREATE TABLE IF NOT EXISTS samples (directory TEXT, sample_name TEXT, signature TEXT, metrics TEXT, PRIMARY KEY (directory, sample_name))")
+        cache = { (directory, sample_name): (signature, metrics) for directory, sample_name, signature, metrics in connection.execute("SELECT directory, sample_name, signature, metrics FROM samples") }
+        connection.close()
+    except sqlite3.Error as e:
+        print("Warning: Couldn't read the cache " + cache_file + " (" + str(e) + "), all samples will be parsed.")
+        return {}
+    return cache
+
+def update_cache(cache_file, entries):
+    '''Adds or replaces the cache entries for samples that were parsed this run.'''
     try:
-        srst2_file = glob.glob(directory + "/srst2/" + sample_name + "__fullgenes__*_srst2__results.txt")[0]
-    except IndexError:
-        srst2_file = directory + "/srst2/" + sample_name + "__fullgenes__blank_srst2__results.txt"
-    return trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, mlst_file, fairy_file, busco_short_summary, asmbld_ratio, gc, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file
+        connection = sqlite3.connect(cache_file)
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?)", entries)
+        connection.close()
+    except sqlite3.Error as e:
+        print("Warning: Couldn't write the cache " + cache_file + " (" + str(e) + "), samples will be parsed again next time.")
+
+def Get_Sample(phoenix_entry, scaffolds_entry, set_coverage, ar_dic, run_options, row, cached=None):
+    '''Collect the files and metrics for one samplesheet row. Kept at the top level so it can be sent to a process pool.
+    If a cache entry is passed and none of the sample's files changed the cached metrics are returned without parsing.'''
+    sample_name = row[0]
+    directory = row[1]
+    index = DirectoryIndex(directory.rstrip('/'))
+    files = Get_Files(directory, sample_name, index)
+    trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, mlst_file, fairy_file, busco_short_summary, asmbld_ratio, gc, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file = files
+    if run_options != None:
+        signature = file_signature(files, run_options)
+        if cached != None and cached[0] == signature:
+            result = load_cached_metrics(cached[1])
+            if result != None:
+                return result, None, index.scans
+    data_location, parent_folder = Get_Parent_Folder(directory)
+    #Get the metrics for the sample
+    metrics = Get_Metrics(phoenix_entry, scaffolds_entry, set_coverage, trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, busco_short_summary, asmbld_ratio, gc, sample_name, mlst_file, fairy_file, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file, ar_dic)
+    sys.stdout.flush() # keep warnings from workers together
+    result = (data_location, parent_folder, sample_name, metrics)
+    if run_options != None:
+        # new cache entry for this sample
+        return result, (directory, sample_name, signature, json.dumps(metrics_to_json(result))), index.scans
+    return result, None, index.scans
 
 def Append_Lists(data_location, parent_folder, sample_name, Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Seq_reads, Paired_Trimmed_reads, Total_trim_Seq_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, \
             Scaffold_Count, busco_metrics, gc_metrics, assembly_ratio_metrics, QC_result, QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2, \
@@ -1044,7 +1102,7 @@ def add_srst2(ar_df, srst2_ar_df):
     # Combine values in cells for columns that are in both dataframes
     for col in common_cols:
         if col != "WGS_ID":
-            ar_combined_df[col] = (srst2_ar_df[col].map(str) + ":" + ar_df[col]).replace(':', "")
+            ar_combined_df[col] = (srst2_ar_df[col].astype(str) + ":" + ar_df[col].astype(str)).replace(':', "")
             ar_combined_df[col] = ar_combined_df[col].map(lambda x: str(x).lstrip(':').rstrip(':')) # clean up : for cases where there isn't a gamma and srst2 for all rows
             ar_combined_df = ar_combined_df.copy() #defragment to correct "PerformanceWarning: DataFrame is highly fragmented."
         else:
@@ -1156,18 +1214,24 @@ def Combine_dfs(df, ar_df, pf_df, hv_df, srst2_ar_df, phoenix):
     pf_db = ",".join(pf_db)
     return final_df, ar_max_col, columns_to_highlight, final_ar_df, pf_db, ar_db, hv_db
 
-def write_to_excel(set_coverage, output, df, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db, phoenix):
-    # Create a Pandas Excel writer using XlsxWriter as the engine.
+def write_to_excel(set_coverage, output, df, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db, phoenix, low_memory=False):
     if output != "":
-        writer = pd.ExcelWriter((output + '_GRiPHin_Summary.xlsx'), engine='xlsxwriter')
+        excel_file = output + '_GRiPHin_Summary.xlsx'
     else:
-        writer = pd.ExcelWriter(('GRiPHin_Summary.xlsx'), engine='xlsxwriter')
-    # Convert the dataframe to an XlsxWriter Excel object.
-    df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=1)
-    # Get the xlsxwriter workfbook worksheet objects for formating
-    workbook = writer.book
+        excel_file = 'GRiPHin_Summary.xlsx'
     (max_row, max_col) = df.shape # Get the dimensions of the dataframe.
-    worksheet = writer.sheets['Sheet1']
+    if low_memory == True:
+        # constant_memory flushes each row to disk once the next one is started, so everything below has to be written top to bottom
+        workbook = ws.Workbook(excel_file, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Sheet1')
+    else:
+        # Create a Pandas Excel writer using XlsxWriter as the engine.
+        writer = pd.ExcelWriter(excel_file, engine='xlsxwriter')
+        # Convert the dataframe to an XlsxWriter Excel object.
+        df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=1)
+        # Get the xlsxwriter workfbook worksheet objects for formating
+        workbook = writer.book
+        worksheet = writer.sheets['Sheet1']
     # Setting columns to numbers so you can have commas that make it more human readable
     number_comma_format = workbook.add_format({'num_format': '#,##0'})
     ##worksheet.set_column('H:J', None, number_comma_format) # Total_seqs (raw and trimmed) Total_bp - use when python is >3.7.12
@@ -1229,6 +1293,8 @@ def write_to_excel(set_coverage, output, df, qc_max_col, ar_gene_count, pf_gene_
     worksheet.merge_range(0, qc_max_col, 0, (qc_max_col + ar_gene_count - 1), "Antibiotic Resistance Genes", cell_format_lightgrey)
     worksheet.merge_range(0, (qc_max_col + ar_gene_count), 0 ,(qc_max_col + ar_gene_count + hv_gene_count - 1), "Hypervirulence Genes^^", cell_format_grey)
     worksheet.merge_range(0, (qc_max_col + ar_gene_count + hv_gene_count), 0, (qc_max_col + ar_gene_count + pf_gene_count + hv_gene_count - 1), "Plasmid Incompatibility Replicons^^^", cell_format_darkgrey)
+    if low_memory == True: # column names go in after the merged headers, but before the big 5 genes are colored
+        write_df_header(workbook, worksheet, df, 1)
     # making WGS IDs bold
     bold = workbook.add_format({'bold': True})
     worksheet.set_column('A3:A' + str(max_row + 2), None, bold)
@@ -1262,6 +1328,8 @@ def write_to_excel(set_coverage, output, df, qc_max_col, ar_gene_count, pf_gene_
     ##                if cell_value != "":
     ##                    worksheet.write(cell, cell_value, orange_format)
     ##    column_count = column_count + 1
+    if low_memory == True: # sample rows have to be written before the footers
+        write_df_rows(worksheet, df, 2)
     # Creating footers
     worksheet.write('A' + str(max_row + 4), 'Cells in YELLOW denote isolates outside of ' + str(set_coverage) + '-100X coverage', yellow_format)
     worksheet.write('A' + str(max_row + 5), 'Cells in ORANGE denote “Big 5” carbapenemase gene (i.e., blaKPC, blaNDM, blaOXA-48-like, blaVIM, and blaIMP) or an acquired blaOXA gene, please confirm what AR Lab Network HAI/AR WGS priority these meet.', orange_format_nb)
@@ -1279,7 +1347,10 @@ def write_to_excel(set_coverage, output, df, qc_max_col, ar_gene_count, pf_gene_
     # add autofilter
     worksheet.autofilter(1, 0, max_row, max_col - 1)
     # Close the Pandas Excel writer and output the Excel file.
-    writer.save()
+    if low_memory == True:
+        workbook.close()
+    else:
+        writer.save()
 
 def blind_samples(final_df, control_file):
     """If you passed a file to -c this will swap out sample names to 'blind' the WGS_IDs in the final excel file."""
@@ -1332,30 +1403,24 @@ def sort_samplesheet(samplesheet):
     df = df.loc[samples_sorted]
     df.to_csv(samplesheet, sep=',', encoding='utf-8') #overwrite file
 
-def convert_excel_to_tsv(output):
-    '''Reads in the xlsx file that was just created, outputs as tsv version with first layer of headers removed'''
+def write_tsv(output, df):
+    '''Writes the final dataframe as the tsv version of the summary, same as the xlsx with the first layer of headers and the footers removed.'''
     if output != "":
         output_file = output + '_GRiPHin_Summary'
     else:
         output_file = 'GRiPHin_Summary'
-    #Read excel file into a dataframe
-    data_xlsx = pd.read_excel(output_file + '.xlsx', 'Sheet1', index_col=None, header=[1])
-    #Replace all fields having line breaks with space
-    #data_xlsx = data_xlsx.replace('\n', ' ',regex=True)
-    #drop the footer information
-    data_xlsx = data_xlsx.iloc[:-10] 
-    #Write dataframe into csv
-    data_xlsx.to_csv(output_file + '.tsv', sep='\t', encoding='utf-8',  index=False, line_terminator='\n')
+    #Write dataframe straight to tsv rather than reading back in the xlsx file
+    df.to_csv(output_file + '.tsv', sep='\t', encoding='utf-8',  index=False, line_terminator='\n')
 
 def main():
     args = parseArgs()
     # create empty lists to append to later
     Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, Scaffold_Count_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L, alerts_L, \
     busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L, MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L, data_location_L, parent_folder_L= ([] for i in range(36))
-    ar_df = pd.DataFrame() #create empty dataframe to fill later for AR genes
-    pf_df = pd.DataFrame() #create another empty dataframe to fill later for Plasmid markers
-    hv_df = pd.DataFrame() #create another empty dataframe to fill later for hypervirulence genes
-    srst2_ar_df = pd.DataFrame()
+    ar_rows = [] #create empty list of per sample rows to build the AR gene dataframe from later
+    pf_rows = [] #create another empty list to build the Plasmid markers dataframe from later
+    hv_rows = [] #create another empty list to build the hypervirulence genes dataframe from later
+    srst2_ar_rows = []
     # Since srst2 currently doesn't handle () in the gene names we will make a quick detour to fix this... first making a dictionary
     ar_dic = make_ar_dictionary(args.ar_db)
     # check if a directory or samplesheet was given
@@ -1371,21 +1436,51 @@ def main():
     with open(samplesheet) as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=',')
         header = next(csv_reader) # skip the first line of the samplesheet
-        for row in csv_reader:
-            sample_name = row[0]
-            directory = row[1]
-            data_location, parent_folder = Get_Parent_Folder(directory)
-            trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, mlst_file, fairy_file, busco_short_summary, asmbld_ratio, gc, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file = Get_Files(directory, sample_name)
-            #Get the metrics for the sample
-            srst2_ar_df, pf_df, ar_df, hv_df, Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Seq_reads, Paired_Trimmed_reads, Total_trim_Seq_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, Scaffold_Count, busco_metrics, gc_metrics, assembly_ratio_metrics, QC_result, \
-            QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2 = Get_Metrics(args.phoenix, args.scaffolds, args.set_coverage, srst2_ar_df, pf_df, ar_df, hv_df, trim_stats, raw_stats, kraken_trim, kraken_trim_report, kraken_wtasmbld_report, kraken_wtasmbld, quast_report, busco_short_summary, asmbld_ratio, gc, sample_name, mlst_file, fairy_file, gamma_ar_file, gamma_pf_file, gamma_hv_file, fast_ani_file, tax_file, srst2_file, ar_dic)
-            #Collect this mess of variables into appeneded lists
-            data_location_L, parent_folder_L, Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L , alerts_L, \
-            Scaffold_Count_L, busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L , MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L = Append_Lists(data_location, parent_folder, sample_name, \
-            Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Seq_reads, Paired_Trimmed_reads, Total_trim_Seq_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, Scaffold_Count, busco_metrics, \
-            gc_metrics, assembly_ratio_metrics, QC_result, QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2, \
-            data_location_L, parent_folder_L, Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L, alerts_L, \
-            Scaffold_Count_L, busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L, MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L)
+        rows = list(csv_reader)
+    if args.cache != None:
+        cache = load_cache(args.cache)
+        cached = [ cache.get((row[1], row[0])) for row in rows ]
+        # anything that changes how metrics are made also has to invalidate the cache
+        ar_db_info = os.stat(args.ar_db)
+        run_options = [get_version(), args.phoenix, args.scaffolds, str(args.set_coverage), os.path.abspath(args.ar_db), ar_db_info.st_size, ar_db_info.st_mtime_ns]
+    else:
+        cached = [ None for row in rows ]
+        run_options = None
+    new_cache_entries = []
+    directory_scans = 0
+    get_sample = partial(Get_Sample, args.phoenix, args.scaffolds, args.set_coverage, ar_dic, run_options)
+    if args.threads > 1:
+        # parse samples in parallel, pool.map hands results back in samplesheet order. The with block shuts the pool down even if a worker raises
+        with ProcessPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(get_sample, rows, cached, chunksize=max(1, len(rows) // (args.threads * 4))))
+    else:
+        results = map(get_sample, rows, cached)
+    for (data_location, parent_folder, sample_name, metrics), cache_entry, scans in results:
+        directory_scans = directory_scans + scans
+        if cache_entry != None:
+            new_cache_entries.append(cache_entry)
+        srst2_ar_row, pf_row, ar_row, hv_row, Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Seq_reads, Paired_Trimmed_reads, Total_trim_Seq_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, Scaffold_Count, busco_metrics, gc_metrics, assembly_ratio_metrics, QC_result, \
+        QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2 = metrics
+        srst2_ar_rows.append(srst2_ar_row)
+        pf_rows.append(pf_row)
+        ar_rows.append(ar_row)
+        hv_rows.append(hv_row)
+        #Collect this mess of variables into appeneded lists
+        data_location_L, parent_folder_L, Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L , alerts_L, \
+        Scaffold_Count_L, busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L , MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L = Append_Lists(data_location, parent_folder, sample_name, \
+        Q30_R1_per, Q30_R2_per, Total_Raw_Seq_bp, Total_Seq_reads, Paired_Trimmed_reads, Total_trim_Seq_reads, Trim_kraken, Asmbld_kraken, Coverage, Assembly_Length, FastANI_output_list, warnings, alerts, Scaffold_Count, busco_metrics, \
+        gc_metrics, assembly_ratio_metrics, QC_result, QC_reason, MLST_scheme_1, MLST_scheme_2, MLST_type_1, MLST_type_2, MLST_alleles_1, MLST_alleles_2, MLST_source_1, MLST_source_2, \
+        data_location_L, parent_folder_L, Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L, alerts_L, \
+        Scaffold_Count_L, busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L, MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L)
+    print("Listed " + str(directory_scans) + " directories to find files for " + str(len(rows)) + " samples instead of " + str(9*len(rows)) + " glob calls.")
+    if args.cache != None:
+        print("Parsed " + str(len(new_cache_entries)) + " of " + str(len(rows)) + " samples, the rest were taken from " + args.cache)
+        update_cache(args.cache, new_cache_entries)
+    # build the gene dataframes once now that all samples are parsed
+    ar_df = build_gene_df(ar_rows)
+    pf_df = build_gene_df(pf_rows)
+    hv_df = build_gene_df(hv_rows)
+    srst2_ar_df = build_gene_df(srst2_ar_rows)
     # combine all lists into a dataframe
     df = Create_df(args.phoenix, data_location_L, parent_folder_L, Sample_Names, Q30_R1_per_L, Q30_R2_per_L, Total_Raw_Seq_bp_L, Total_Seq_reads_L, Paired_Trimmed_reads_L, Total_trim_Seq_reads_L, Trim_kraken_L, Asmbld_kraken_L, Coverage_L, Assembly_Length_L, Species_Support_L, fastani_organism_L, fastani_ID_L, fastani_coverage_L, warnings_L, alerts_L, \
     Scaffold_Count_L, busco_lineage_L, percent_busco_L, gc_L, assembly_ratio_L, assembly_stdev_L, tax_method_L, QC_result_L, QC_reason_L, MLST_scheme_1_L, MLST_scheme_2_L, MLST_type_1_L, MLST_type_2_L, MLST_alleles_1_L , MLST_alleles_2_L, MLST_source_1_L, MLST_source_2_L)
@@ -1393,13 +1488,15 @@ def main():
     pf_max_col = pf_df.shape[1] - 1 #remove one for the WGS_ID column
     hv_max_col = hv_df.shape[1] - 1 #remove one for the WGS_ID column
     final_df, ar_max_col, columns_to_highlight, final_ar_df, pf_db, ar_db, hv_db = Combine_dfs(df, ar_df, pf_df, hv_df, srst2_ar_df, args.phoenix)
+    final_df = densify(final_df)
     # Checking if there was a control sheet submitted
     if args.control_list !=None:
         final_df = blind_samples(final_df, args.control_list)
     else:
         final_df = final_df
-    write_to_excel(args.set_coverage, args.output, final_df, qc_max_col, ar_max_col, pf_max_col, hv_max_col, columns_to_highlight, final_ar_df, pf_db, ar_db, hv_db, args.phoenix)
-    convert_excel_to_tsv(args.output)
+    if args.tsv_only == False:
+        write_to_excel(args.set_coverage, args.output, final_df, qc_max_col, ar_max_col, pf_max_col, hv_max_col, columns_to_highlight, final_ar_df, pf_db, ar_db, hv_db, args.phoenix, args.low_memory)
+    write_tsv(args.output, final_df)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+## Builds the gene name -> conferred resistance dictionary from the headers of the AR gene database (ResGANNCBI) fasta.
+## The dictionary is saved next to the database as <database>.ar_dic.json along with the size, mtime and md5 of the database,
+## so later runs (and other scripts) can load it instead of reading the fasta again. ASSET_CHECK writes it once per run and GRIPHIN gets it staged next to the database.
+## Usage: >python ar_dictionary.py -a ResGANNCBI_20230517_srst2.fasta
+
+import os
+import json
+import hashlib
+import argparse
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to build the gene name to conferred resistance index for an AR gene database.')
+    parser.add_argument('-a', '--ar_db', required=True, dest='ar_db', help='AR Gene Database fasta file to index.')
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+def file_checksum(file):
+    """Returns the md5 of a file, read in 1MB blocks."""
+    md5 = hashlib.md5()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+def file_stamp(file):
+    """Size and mtime of a file, these follow symlinks so a database staged by nextflow has the same stamp as the original."""
+    stat = os.stat(file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def read_headers(ar_db):
+    """Returns the ids of the sequences in a fasta, only looking at the header lines. Same as seq_record.id from SeqIO."""
+    seq_id_list = []
+    with open(ar_db, 'rb') as f: # bytes so only the header lines get decoded
+        for line in f:
+            if line[:1] == b'>':
+                seq_id_list.append((line[1:].split(None, 1) or [b''])[0].decode())
+    return seq_id_list
+
+def index_file(ar_db):
+    return ar_db + ".ar_dic.json"
+
+def build_ar_dictionary(ar_db):
+    """Headers look like >1__blaKPC__blaKPC-2_1__10__Carbapenem, so gene name is the 3rd field and the drug the 5th."""
+    seq_id_list = read_headers(ar_db)
+    gene_name_list = [seq_id.split("__")[2] for seq_id in seq_id_list]
+    drug_list = [seq_id.split("__")[4] for seq_id in seq_id_list]
+    return dict(zip(gene_name_list, drug_list))
+
+def write_index(ar_db, stamp, checksum, ar_dic):
+    """Saves the dictionary next to the database. The database folder might not be writable (containers) so this is skipped if it fails."""
+    index = index_file(ar_db)
+    tmp_index = index + "." + str(os.getpid()) + ".tmp" # write to a temp file first so another process never reads half an index
+    try:
+        with open(tmp_index, 'w') as f:
+            json.dump({'stamp': stamp, 'md5': checksum, 'ar_dic': ar_dic}, f)
+        os.replace(tmp_index, index)
+    except OSError:
+        if os.path.exists(tmp_index):
+            os.remove(tmp_index)
+        print("Warning: Couldn't write " + index + ", the AR database headers will be read again next time.")
+
+def make_ar_dictionary(ar_db):
+    """Returns the gene name -> conferred resistance dictionary for ar_db, using the saved index if it was made from the same database.
+    Size and mtime are checked first, the database is only read for its md5 when those changed (e.g. it was copied)."""
+    stamp = file_stamp(ar_db)
+    checksum = None
+    try:
+        with open(index_file(ar_db), 'r') as f:
+            index = json.load(f)
+        if index['stamp'] == stamp:
+            return index['ar_dic']
+        checksum = file_checksum(ar_db)
+        if index['md5'] == checksum:
+            write_index(ar_db, stamp, checksum, index['ar_dic']) # same database with a new mtime, save it so the md5 isn't needed next time
+            return index['ar_dic']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass # no index yet or it is unreadable, just rebuild it
+    ar_dic = build_ar_dictionary(ar_db)
+    write_index(ar_db, stamp, checksum if checksum != None else file_checksum(ar_db), ar_dic)
+    return ar_dic
+
+def main():
+    args = parseArgs()
+    ar_dic = make_ar_dictionary(args.ar_db)
+    print("Indexed " + str(len(ar_dic)) + " genes from " + args.ar_db + " in " + index_file(args.ar_db))
+
+if __name__ == '__main__':
+    main()
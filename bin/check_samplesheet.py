@@ -8,6 +8,12 @@ import errno
 import argparse
 import gzip
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from isal import igzip # faster gzip from intel's isa-l, used when installed
+except ImportError:
+    igzip = None
 
 # Function to get the script version
 def get_version():
@@ -19,6 +25,9 @@ def parse_args(args=None):
     parser = argparse.ArgumentParser(description=Description, epilog=Epilog)
     parser.add_argument("FILE_IN", help="Input samplesheet file.")
     parser.add_argument("FILE_OUT", help="Output file.")
+    parser.add_argument("-t", "--threads", dest="threads", default=os.cpu_count(), type=int, help="Number of FastQ files to gzip at the same time. Default is the number of cpus.")
+    parser.add_argument("-l", "--level", dest="level", default=9, type=int, choices=range(1, 10), help="gzip compression level for FastQ files that aren't gzipped. Default is 9.")
+    parser.add_argument("-u", "--keep_uncompressed", dest="keep_uncompressed", default=False, action="store_true", help="Pass FastQ files that aren't gzipped on as they are rather than gzipping them.")
     parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
     return parser.parse_args(args)
 
@@ -32,30 +41,35 @@ def make_dir(path):
                 raise exception
 
 
-def print_error(error, context="Line", context_str=""):
+def print_error(error, context="Line", context_str="", exit=True):
     error_str = "ERROR: Please check samplesheet -> {}".format(error)
     if context != "" and context_str != "":
         error_str = "ERROR: Please check samplesheet -> {}\n{}: '{}'".format(
             error, context.strip(), context_str.strip()
         )
     print(error_str)
-    sys.exit(1)
-
-
-def check_samplesheet(file_in, file_out):
-    """
-    This function checks that the samplesheet follows the following structure:
-
-    sample,fastq_1,fastq_2
-    SAMPLE_PE,SAMPLE_PE_RUN1_1.fastq.gz,SAMPLE_PE_RUN1_2.fastq.gz
-    SAMPLE_PE,SAMPLE_PE_RUN2_1.fastq.gz,SAMPLE_PE_RUN2_2.fastq.gz
-    SAMPLE_SE,SAMPLE_SE_RUN1_1.fastq.gz,
-
-    For an example see:
-    https://raw.githubusercontent.com/nf-core/test-datasets/viralrecon/samplesheet/samplesheet_test_illumina_amplicon.csv
-    """
-
-    sample_mapping_dict = {}
+    if exit:
+        sys.exit(1)
+
+
+def gzip_fastq(fastq, level):
+    """Gzips fastq to fastq.gz, writing to a temp file first so a half written .gz is never left behind."""
+    fastq_gz = fastq + ".gz"
+    tmp_gz = fastq_gz + ".tmp"
+    gzip_file = igzip.IGzipFile if igzip != None and level <= 3 else gzip.GzipFile # isa-l is several times faster than zlib at levels 1-3
+    try:
+        with open(fastq, "rb") as f_in, open(tmp_gz, "wb") as tmp_out:
+            with gzip_file(filename=os.path.basename(fastq), mode="wb", compresslevel=level, fileobj=tmp_out) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.replace(tmp_gz, fastq_gz)
+    except:
+        if os.path.exists(tmp_gz):
+            os.remove(tmp_gz)
+        raise
+
+
+def check_rows(file_in, sample_mapping_dict, pool, gzipping, level, keep_uncompressed):
+    """Checks the header and each row of the samplesheet, filling sample_mapping_dict and handing FastQ files that need gzipping to pool."""
     with open(file_in, "r") as fin:
 
         ## Check header
@@ -130,11 +144,9 @@ def check_samplesheet(file_in, file_out):
                 if fastq:
                     if fastq.find(" ") != -1:
                         print_error("FastQ file contains spaces!", "Line", line)
-                    if not fastq.endswith(".fastq.gz") and not fastq.endswith(".fq.gz"): # If file is not gzipped then gzip it. 
-                        fastq_gz = fastq + ".gz"
-                        with open(fastq, "rb") as f_in:
-                            with gzip.open(fastq_gz, 'wb') as f_out: 
-                                f_out.writelines(f_in)
+                    if not fastq.endswith(".fastq.gz") and not fastq.endswith(".fq.gz") and keep_uncompressed == False: # If file is not gzipped then gzip it. 
+                        if os.path.realpath(fastq) not in gzipping:
+                            gzipping[os.path.realpath(fastq)] = (pool.submit(gzip_fastq, fastq, level), line)
                         print("FastQ file does not have extension '.fastq.gz' or '.fq.gz'! Zipping file.",
                             "Line",
                             line,
@@ -158,6 +170,47 @@ def check_samplesheet(file_in, file_out):
                 else:
                     sample_mapping_dict[sample].append(sample_info)
 
+
+def check_samplesheet(file_in, file_out, threads=1, level=9, keep_uncompressed=False):
+    """
+    This function checks that the samplesheet follows the following structure:
+
+    sample,fastq_1,fastq_2
+    SAMPLE_PE,SAMPLE_PE_RUN1_1.fastq.gz,SAMPLE_PE_RUN1_2.fastq.gz
+    SAMPLE_PE,SAMPLE_PE_RUN2_1.fastq.gz,SAMPLE_PE_RUN2_2.fastq.gz
+    SAMPLE_SE,SAMPLE_SE_RUN1_1.fastq.gz,
+
+    For an example see:
+    https://raw.githubusercontent.com/nf-core/test-datasets/viralrecon/samplesheet/samplesheet_test_illumina_amplicon.csv
+
+    FastQ files that aren't gzipped are gzipped by a pool of threads while the rest of the rows are checked, unless keep_uncompressed is True.
+    """
+
+    sample_mapping_dict = {}
+    pool = ThreadPoolExecutor(max_workers=max(threads, 1))
+    gzipping = {} # real path: (future, line) of the files being gzipped, so a file listed twice is only gzipped once
+    try:
+        check_rows(file_in, sample_mapping_dict, pool, gzipping, level, keep_uncompressed)
+    except SystemExit:
+        # don't exit with threads still writing .gz.tmp files, drop the files not started yet and let the rest finish
+        for future, line in gzipping.values():
+            future.cancel()
+        pool.shutdown()
+        raise
+
+    ## Wait for the FastQ files being gzipped, errors are printed after the pool is shut down
+    gzip_errors = []
+    for future, line in gzipping.values():
+        try:
+            future.result()
+        except OSError as e:
+            gzip_errors.append(("Couldn't gzip FastQ file! {}".format(e), line))
+    pool.shutdown()
+    for error, line in gzip_errors:
+        print_error(error, "Line", line, exit=False)
+    if len(gzip_errors) > 0:
+        sys.exit(1)
+
     ## Write validated samplesheet with appropriate columns
     if len(sample_mapping_dict) > 0:
         out_dir = os.path.dirname(file_out)
@@ -173,10 +226,10 @@ def check_samplesheet(file_in, file_out):
 #                for idx, val in enumerate(sample_mapping_dict[sample]):
 #                    fout.write(",".join(["{}_T{}".format(sample, idx + 1)] + val) + "\n")
                 for idx, val in enumerate(sample_mapping_dict[sample]):
-                    if not val[1].endswith(".gz"): # check that forward read is a gzip file
+                    if not val[1].endswith(".gz") and keep_uncompressed == False: # check that forward read is a gzip file
                         val[1] = re.sub(".fastq$", ".fastq.gz", val[1])
                         val[1] = re.sub(".fq$", ".fq.gz", val[1])
-                    if not val[2].endswith(".gz"): # check that reverse read is a gzip file
+                    if not val[2].endswith(".gz") and keep_uncompressed == False: # check that reverse read is a gzip file
                         val[2] = re.sub(".fastq$", ".fastq.gz", val[2])
                         val[2] = re.sub(".fq$", ".fq.gz", val[2])
                     fout.write(",".join(["{}".format(sample)] + val) + "\n")
@@ -186,7 +239,7 @@ def check_samplesheet(file_in, file_out):
 
 def main(args=None):
     args = parse_args(args)
-    check_samplesheet(args.FILE_IN, args.FILE_OUT)
+    check_samplesheet(args.FILE_IN, args.FILE_OUT, args.threads, args.level, args.keep_uncompressed)
 
 
 if __name__ == "__main__":
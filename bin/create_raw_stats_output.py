@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
+import sys
 import argparse
 from argparse import ArgumentParser
 from decimal import *
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import read_counts
+import read_counts
 
 ##Makes pre- and post-filtering QC outputs
 ##Usage: >python3 FastP_QC.py paired_fastp.json single_fastp_json Isolate_Name
@@ -23,15 +27,14 @@ def parse_cmdline():
 	return args
 
 def write_raw_stats(raw_R1_reads, raw_R1_bases, Q20_R1_bp, Q20_R1_percent, Q30_R1_bp, Q30_R1_percent, raw_R2_reads, raw_R2_bases, Q20_R2_bp, Q20_R2_percent, Q30_R2_bp, Q30_R2_percent, output_file, name):
-    """Makes a QC output file from parsed output of q30.py files."""
-    with open(output_file, 'w') as f:
-        f.write('Name\tR1[reads]\tR1[bp]\tR2[reads]\tR2[bp]\tQ20_Total_[bp]\tQ30_Total_[bp]\tQ20_R1_[bp]\tQ20_R2_[bp]\tQ20_R1_[%]\tQ20_R2_[%]\tQ30_R1_[bp]\tQ30_R2_[bp]\tQ30_R1_[%]\tQ30_R2_[%]\tTotal_Sequenced_[bp]\tTotal_Sequenced_[reads]\n')
-        Q20_Total = str(Q20_R1_bp + Q20_R2_bp)
-        Q30_Total = str(Q30_R1_bp + Q30_R2_bp)
-        Total_Sequenced_bp = str(raw_R1_bases + raw_R2_bases)
-        Total_Sequenced_reads = str(raw_R1_reads + raw_R2_reads)
-        Line = name + '\t' + str(raw_R1_reads) + '\t' + str(raw_R1_bases) + '\t' + str(raw_R2_reads) + '\t' + str(raw_R2_bases) + '\t' + Q20_Total + '\t' + Q30_Total + '\t' + str(Q20_R1_bp) + '\t' + str(Q20_R2_bp) + '\t' + str(Q20_R1_percent) + '\t' + str(Q20_R2_percent) + '\t' + str(Q30_R1_bp) + '\t' + str(Q30_R2_bp) + '\t' +str( Q30_R1_percent) + '\t' + str(Q30_R2_percent) + '\t' + Total_Sequenced_bp + '\t' + Total_Sequenced_reads
-        f.write(Line)
+    """Makes a QC output file, and the .json of it, from parsed output of q30.py files."""
+    columns = ['Name', 'R1[reads]', 'R1[bp]', 'R2[reads]', 'R2[bp]', 'Q20_Total_[bp]', 'Q30_Total_[bp]', 'Q20_R1_[bp]', 'Q20_R2_[bp]', 'Q20_R1_[%]', 'Q20_R2_[%]', 'Q30_R1_[bp]', 'Q30_R2_[bp]', 'Q30_R1_[%]', 'Q30_R2_[%]', 'Total_Sequenced_[bp]', 'Total_Sequenced_[reads]']
+    Q20_Total = Q20_R1_bp + Q20_R2_bp
+    Q30_Total = Q30_R1_bp + Q30_R2_bp
+    Total_Sequenced_bp = raw_R1_bases + raw_R2_bases
+    Total_Sequenced_reads = raw_R1_reads + raw_R2_reads
+    values = [name, raw_R1_reads, raw_R1_bases, raw_R2_reads, raw_R2_bases, Q20_Total, Q30_Total, Q20_R1_bp, Q20_R2_bp, Q20_R1_percent, Q20_R2_percent, Q30_R1_bp, Q30_R2_bp, Q30_R1_percent, Q30_R2_percent, Total_Sequenced_bp, Total_Sequenced_reads]
+    read_counts.write_counts(output_file, columns, values)
 
 def get_raw_stats(stats):
     with open(stats) as f:
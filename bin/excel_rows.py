@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+## Writes dataframes to an xlsxwriter worksheet cell by cell, the same cells pandas to_excel would give.
+## Used by GRiPHin.py and terra_combine_griphin.py for their constant_memory (--low_memory) workbooks, which have to be written top to bottom.
+
+import pandas as pd
+import numpy as np
+
+def excel_value(value):
+    """Converts a dataframe value to what pandas would hand xlsxwriter for it, so both excel writers give the same cells."""
+    if pd.isna(value):
+        return ""
+    elif pd.api.types.is_integer(value):
+        return int(value)
+    elif pd.api.types.is_float(value):
+        if np.isinf(value):
+            return "inf" if value > 0 else "-inf"
+        return float(value)
+    elif pd.api.types.is_bool(value):
+        return bool(value)
+    return str(value)
+
+def write_df_header(workbook, worksheet, df, row):
+    """Writes the column names with the same format pandas uses for the header row."""
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    for col, column_name in enumerate(df.columns):
+        worksheet.write(row, col, excel_value(column_name), header_format)
+
+def write_df_rows(worksheet, df, startrow):
+    """Writes the values of the dataframe top to bottom, as needed for a constant_memory workbook."""
+    for row, values in enumerate(df.itertuples(index=False, name=None), startrow):
+        for col, value in enumerate(values):
+            worksheet.write(row, col, excel_value(value))
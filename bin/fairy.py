@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-import pandas as pd
 import argparse
-import os
+import os,sys
 from datetime import date
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import read_counts
+import read_counts
 
 ## Output check for messages indicating read pairs that do not match
 ## v1.0.0 Written by Maria Diaz edits to v2.0.0 by Jill Hagey
@@ -23,15 +25,15 @@ def parseArgs(args=None):
 ## Compare the GET_RAW_STATS module combined reads output
 def reads_compare(read_file, trimd_file, filename, busco):
     prefix = read_file.split("_raw")[0]
-    aggr_read_stats = pd.read_csv(read_file, sep="\t")
+    aggr_read_stats = read_counts.read_counts(read_file)
     if trimd_file != None: # if you have reached the trim step then read pairs were prior to trimming and we will check there are reads post trimming
-        aggr_trimd_stats = pd.read_csv(trimd_file, sep="\t")
+        aggr_trimd_stats = read_counts.read_counts(trimd_file)
 
         approved = "\nPASSED: There are reads in " + prefix + " R1/R2 after trimming."
         failure = "\nFAILED: There are 0 reads in " + prefix + " R1/R2 after trimming!" #essentially should never show up
         error = "There are 0 reads in R1/R2 after trimming!"
 
-        if aggr_trimd_stats["R1[reads]"].values[0] > 0 and aggr_trimd_stats["R2[reads]"].values[0] > 0 :
+        if int(aggr_trimd_stats["R1[reads]"]) > 0 and int(aggr_trimd_stats["R2[reads]"]) > 0 :
             outcome = approved
         else: # if there are no reads after trimming write a synopsis and summary line file for them. 
             outcome = failure
@@ -46,44 +48,54 @@ def reads_compare(read_file, trimd_file, filename, busco):
             tmp.write("\nEnd_of_File")
         os.rename(filename, prefix + "_summary.txt")
 
-    else: # Check if read pairs are equal and if they aren't write a synopsis and summary line file for them. 
-        approved = "PASSED: Read pairs for " + prefix + " are equal."
-        failure = "FAILED: The number of reads in R1/R2 are NOT the same!" #essentially should never show up
-        error = "The number of reads in R1/R2 are NOT the same!"
+    else:
+        pairs_compare(prefix, aggr_read_stats, filename, busco)
 
-        # Confirm number of R1 reads are the same as R2 reads
-        if aggr_read_stats["R1[reads]"].equals(aggr_read_stats["R2[reads]"]) is True:
-            outcome = approved
-        else:
-            outcome = failure
-            raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, raw_orphaned_reads = get_read_stats(aggr_read_stats, "false")
-            trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, trimd_orphaned_reads = (None for i in range(7))
-            warning_count = write_synopsis(prefix, busco, raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, trimd_file, trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, trimd_orphaned_reads)
-            write_summary_line(prefix, busco, warning_count, error)
-        #write to end of *_summary.txt file
-        #filename = prefix + "_summary_old.txt"
-        with open(filename, "a") as tmp:
-            tmp.write(outcome)
-        os.rename(filename, prefix + "_summary.txt")
+def pairs_compare(prefix, aggr_read_stats, filename, busco, pair_error=None):
+    """Check if read pairs are equal and if they aren't write a synopsis and summary line file for them. Also used by q30.py when it makes the raw read counts itself,
+    it passes pair_error when it finds a read without its mate, which fails the check even if the counts it got to are the same."""
+    approved = "PASSED: Read pairs for " + prefix + " are equal."
+    failure = "FAILED: The number of reads in R1/R2 are NOT the same!" #essentially should never show up
+    error = "The number of reads in R1/R2 are NOT the same!"
+    if pair_error != None:
+        failure = "FAILED: " + pair_error
+        error = pair_error
+
+    # Confirm number of R1 reads are the same as R2 reads
+    if pair_error == None and int(aggr_read_stats["R1[reads]"]) == int(aggr_read_stats["R2[reads]"]):
+        outcome = approved
+    else:
+        outcome = failure
+        raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, raw_orphaned_reads = get_read_stats(aggr_read_stats, "false")
+        trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, trimd_orphaned_reads = (None for i in range(7))
+        warning_count = write_synopsis(prefix, busco, raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, None, trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, trimd_orphaned_reads, pair_error)
+        write_summary_line(prefix, busco, warning_count, error)
+    #write to end of *_summary.txt file
+    #filename = prefix + "_summary_old.txt"
+    with open(filename, "a") as tmp:
+        tmp.write(outcome)
+    os.rename(filename, prefix + "_summary.txt")
 
 def get_read_stats(aggr_read_stats, trimmed):
-    length_R1 = str(aggr_read_stats["R1[bp]"].values[0])
-    length_R2 = str(aggr_read_stats["R2[bp]"].values[0])
-    reads = int(aggr_read_stats["Total_Sequenced_[reads]"].values[0])
+    length_R1 = str(aggr_read_stats["R1[bp]"])
+    length_R2 = str(aggr_read_stats["R2[bp]"])
+    reads = int(aggr_read_stats["Total_Sequenced_[reads]"])
     pairs = str(reads/2)
     if trimmed == "true":
-        orphaned_reads = str(aggr_read_stats["Unpaired[reads]"].values[0])
+        orphaned_reads = str(aggr_read_stats["Unpaired[reads]"])
     else:
         orphaned_reads = str(0)
-    Q30_R1_rounded = round((float(aggr_read_stats["Q30_R1_[%]"].values[0])*100), 2)
-    Q30_R2_rounded = round((float(aggr_read_stats["Q30_R2_[%]"].values[0])*100), 2)
+    Q30_R1_rounded = round((float(aggr_read_stats["Q30_R1_[%]"])*100), 2)
+    Q30_R2_rounded = round((float(aggr_read_stats["Q30_R2_[%]"])*100), 2)
     return length_R1, length_R2, reads, pairs, Q30_R1_rounded, Q30_R2_rounded, orphaned_reads
 
 
-def write_synopsis(sample_name, busco, raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, trimd_file, trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, orphaned_reads):
+def write_synopsis(sample_name, busco, raw_length_R1, raw_length_R2, raw_reads, raw_pairs, raw_Q30_R1_rounded, raw_Q30_R2_rounded, trimd_file, trimd_length_R1, trimd_length_R2, trimd_reads, trimd_pairs, trimd_Q30_R1_rounded, trimd_Q30_R2_rounded, orphaned_reads, pair_error=None):
     status="FAILED"
     warning_count=0
-    if trimd_file == None:
+    if pair_error != None:
+        Error = pair_error + "\n"
+    elif trimd_file == None:
         Error = "Unequal number of reads in R1/R2!\n"
     else:
         Error = "No reads after trimming!\n"
@@ -174,6 +186,10 @@ def write_synopsis(sample_name, busco, raw_length_R1, raw_length_R2, raw_reads,
         f.write("ALERT: something to note, does not mean it is a poor-quality assembly.")
     return warning_count
 
+def tsv_field(value):
+    """Tabs, newlines and quotes (read names can end up in the error) would shift or break the summaryline columns, so they are swapped for spaces or dropped."""
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ").replace('"', "")
+
 def write_summary_line(prefix, busco, warning_count, error):
     if busco == True:
         column_names = ['ID','Auto_QC_Outcome','Warning_Count','Estimated_Coverage','Genome_Length',
@@ -191,8 +207,9 @@ def write_summary_line(prefix, busco, warning_count, error):
         'AMRFinder_Point_Mutations','Hypervirulence_Genes','Plasmid_Incompatibility_Replicons','Auto_QC_Failure_Reason']
         data = [[prefix,'FAIL',warning_count,'Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown',
                 'Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown','Unknown', error]]
-    df = pd.DataFrame(data, columns=column_names)
-    df.to_csv(prefix + '_summaryline.tsv', sep="\t",index=False)
+    with open(prefix + '_summaryline.tsv', 'w') as f:
+        f.write("\t".join(column_names) + "\n")
+        f.write("\t".join([tsv_field(value) for value in data[0]]) + "\n")
 
 def main():
     args = parseArgs()
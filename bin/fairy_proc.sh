@@ -65,7 +65,17 @@ fi
 sfx=".fastq.gz"
 #fname="${1}"
 #prefix=${fname%"$sfx"}
-gzip -t $fname 2>> ${prefix}.txt
+if [[ "${fname}" == *.gz ]]; then
+	gzip -t $fname 2>> ${prefix}.txt
+	cat_fastq="zcat"
+else
+	# fastqs that check_samplesheet.py -u passed on without gzipping, just check there is something to read
+	touch ${prefix}.txt
+	if [[ ! -s "${fname}" ]]; then
+		echo "error: ${fname} is empty or unreadable" >> ${prefix}.txt
+	fi
+	cat_fastq="cat"
+fi
 
 full_name=$(basename "${fname}" .fastq.gz)
 # check if it still has .gz on the end  - for *.fq.gz samples
@@ -75,7 +85,7 @@ fi
 
 #get read number - assuming illumina we will check the read names in the fasta files first
 #read=$(zcat "${fname}" | head --lines 1 | cut -f2 -d" " | cut -f1 -d":" | sed 's/^/R/')
-read=$(zcat "${fname}" | head --lines 1 | grep -oP "[1-2]:[NY]:" | cut -f1 -d":" | sed 's/^/R/')
+read=$(${cat_fastq} "${fname}" | head --lines 1 | grep -oP "[1-2]:[NY]:" | cut -f1 -d":" | sed 's/^/R/')
 
 #if the above line didn't capture the read number try some other options
 if [[ "$read" != "R1" ]] && [[ "$read" != "R2" ]]; then
@@ -6,6 +6,22 @@
 
 import gzip
 import os,sys
+import shutil
+import queue
+import threading
+import subprocess
+import numpy as np
+try:
+    from isal import igzip, igzip_threaded # faster gzip from intel's isa-l, used when installed
+except ImportError:
+    igzip = igzip_threaded = None
+
+# size of the blocks read by Reader.__iter__, each one is split into reads with one numpy pass
+BLOCK_SIZE = 4 * 1024 * 1024
+# bytes Writer collects before writing them out in one go
+WRITE_BUFFER_SIZE = 1024 * 1024
+# ways a .gz file can be decompressed, see open_gzip
+DECOMPRESSORS = ["gzip", "thread", "pigz", "isal", "auto"]
 
 def isFastq(f):
     fqext = (".fq", ".fastq", "fq.gz", ".fastq.gz")
@@ -14,19 +30,130 @@ def isFastq(f):
             return True
     return False
 
+################################
+#gzip decompression
+
+class GzipThread(threading.Thread):
+    """Decompresses a gzip file into a pipe from a background thread. zlib lets go of the GIL while it inflates, so this runs alongside the code reading the pipe."""
+
+    def __init__(self, fname):
+        threading.Thread.__init__(self, daemon=True)
+        self.fname = fname
+        self.error = None
+        read_fd, self.write_fd = os.pipe()
+        self.output = os.fdopen(read_fd, "rb")
+        self.start()
+
+    def run(self):
+        try:
+            with gzip.open(self.fname, "rb") as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+                    view = memoryview(block)
+                    while len(view) > 0:
+                        view = view[os.write(self.write_fd, view):]
+        except BrokenPipeError:
+            pass # the reader was closed before the end of the file
+        except Exception as e:
+            self.error = e
+        finally:
+            os.close(self.write_fd)
+
+    def finish(self):
+        """Call at the end of the file, raises the error from the thread if decompressing failed."""
+        self.join()
+        if self.error != None:
+            raise self.error
+
+    def close(self):
+        pass # closing the pipe stops the thread
+
+class GzipProcess:
+    """Decompresses a gzip file with pigz in its own process."""
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.process = subprocess.Popen(["pigz", "-dc", fname], stdout=subprocess.PIPE)
+        self.output = self.process.stdout
+
+    def finish(self):
+        """Call at the end of the file, raises an error if pigz failed."""
+        if self.process.wait() != 0:
+            raise IOError("pigz failed to decompress " + self.fname)
+
+    def close(self):
+        self.process.wait() # pigz stops once its output is closed
+
+def open_gzip(fname, decompress="gzip"):
+    """Opens a .gz file for reading as bytes and returns (handle, worker). worker is the GzipThread/GzipProcess doing the decompressing, or None.
+    gzip: decompress in this thread like before, thread: zlib in a background thread, pigz: pigz in another process, isal: isa-l in a background thread,
+    auto: pigz if it is on the PATH, then isal if it is installed, then a background thread. With only one cpu auto uses isal or plain gzip, as there is nothing to overlap with."""
+    if decompress == "auto":
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() # cpus this process can use on linux
+        if cpus < 2:
+            decompress = "isal" if igzip_threaded != None else "gzip"
+        elif shutil.which("pigz") != None:
+            decompress = "pigz"
+        elif igzip_threaded != None:
+            decompress = "isal"
+        else:
+            decompress = "thread"
+    if decompress == "thread":
+        worker = GzipThread(fname)
+        return worker.output, worker
+    elif decompress == "pigz":
+        if shutil.which("pigz") == None:
+            print("pigz was not found on the PATH, it is needed for --decompress pigz")
+            sys.exit(1)
+        worker = GzipProcess(fname)
+        return worker.output, worker
+    elif decompress == "isal":
+        if igzip_threaded == None:
+            print("The isal python package is not installed, it is needed for --decompress isal")
+            sys.exit(1)
+        return igzip_threaded.open(fname, "rb", threads=1), None
+    return gzip.open(fname, "r"), None
+
+################################
+#read pairs
+
+def pair_name(name):
+    """The part of a read name that is the same for both reads of a pair, without the comment and any /1 or /2 on the end."""
+    return strip_pair_number((bytes(name).split(None, 1) or [b""])[0])
+
+def strip_pair_number(name):
+    return name[:-2] if name[-2:] in (b"/1", b"/2") else name
+
+def first_unpaired(r1_names, r2_names):
+    """Compares the names of the same reads from R1 and R2, returns the index of the first one that doesn't match its mate,
+    or the length of the shorter list if they all match but one file has run out of reads. None if every read has its mate."""
+    paired = min(len(r1_names), len(r2_names))
+    # illumina names only differ in the comment, so cutting that off is usually enough
+    r1_keys = [(bytes(name).split(None, 1) or [b""])[0] for name in r1_names[:paired]]
+    r2_keys = [(bytes(name).split(None, 1) or [b""])[0] for name in r2_names[:paired]]
+    if r1_keys != r2_keys: # older names end in /1 and /2
+        r1_keys = list(map(strip_pair_number, r1_keys))
+        r2_keys = list(map(strip_pair_number, r2_keys))
+        if r1_keys != r2_keys:
+            return next(i for i in range(paired) if r1_keys[i] != r2_keys[i])
+    if len(r1_names) != len(r2_names):
+        return paired
+    return None
+
 ################################
 #fastq.reader
 
 class Reader:
 
-    def __init__(self, fname):
+    def __init__(self, fname, decompress="gzip"):
         self.__file = None
+        self.__worker = None # thread or process decompressing the file, if any
         self.__gz = False
         self.__eof = False
+        self.truncated = False # set by __iter__ if the file ends part way through a read
         self.filename = fname
         if self.filename.endswith(".gz"):
             self.__gz = True
-            self.__file = gzip.open(self.filename, "r")
+            self.__file, self.__worker = open_gzip(self.filename, decompress)
         else:
             self.__gz = False
             self.__file = open(self.filename, "r")
@@ -37,6 +164,13 @@ class Reader:
     def __del__(self):
         if self.__file != None:
             self.__file.close()
+        if self.__worker != None:
+            self.__worker.close()
+
+    def __finish(self):
+        """At the end of the file, wait for the decompressing thread or process and raise its error if it failed."""
+        if self.__worker != None:
+            self.__worker.finish()
             
     def nextRead(self):
         if self.__eof == True or self.__file == None:
@@ -45,62 +179,197 @@ class Reader:
         lines = []
         #read 4 (lines, name, sequence, strand, quality)
         for i in range(0,4):
-            line = self.__file.readline().rstrip()
+            raw_line = self.__file.readline()
+            line = raw_line.rstrip()
             if len(line) == 0:
                 self.__eof = True
+                if len(raw_line) == 0: # end of the file rather than an empty line
+                    self.__finish()
                 return None
             lines.append(line)
         return lines
 
+    def __iter__(self):
+        """Reads the file in large blocks and yields each read as [name, sequence, strand, quality] memoryviews into its block, so lines aren't copied one read at a time.
+        Like nextRead it stops at the first empty line, and trailing '\r's are left off. Use bytes() on a view to get a copy that doesn't hold on to the block."""
+        if self.__eof == True or self.__file == None:
+            return
+        handle = getattr(self.__file, "buffer", self.__file) # uncompressed files are opened as text, read the bytes underneath
+        leftover = b""
+        while True:
+            chunk = handle.read(BLOCK_SIZE)
+            data = leftover + chunk
+            end_of_file = len(chunk) == 0
+            if end_of_file: # finish off the last line if it has no newline
+                if len(data) == 0:
+                    self.__finish()
+                    break
+                if not data.endswith(b"\n"):
+                    data = data + b"\n"
+            byte_array = np.frombuffer(data, dtype=np.uint8)
+            newlines = np.flatnonzero(byte_array == 10)
+            starts = np.concatenate(([0], newlines[:-1] + 1))[:len(newlines)]
+            carriage_returns = (newlines > starts) & (byte_array[newlines - 1] == 13)
+            ends = newlines - carriage_returns
+            line_count = len(ends) // 4 * 4 # only whole reads, the rest goes into the next block
+            empty_lines = np.flatnonzero(ends[:line_count] == starts[:line_count])
+            stop = end_of_file
+            if len(empty_lines) > 0:
+                line_count = empty_lines[0] // 4 * 4
+                stop = True # stop after these reads
+            elif end_of_file and line_count < len(ends) and not (ends[line_count:] == starts[line_count:]).all():
+                self.truncated = True # the last read is missing lines, it is left off like nextRead does
+            view = memoryview(data)
+            # one row per read of the start and end of its 4 lines
+            bounds = np.column_stack((starts[:line_count], ends[:line_count])).reshape(-1, 8).tolist()
+            for name_start, name_end, seq_start, seq_end, strand_start, strand_end, qual_start, qual_end in bounds:
+                yield [view[name_start:name_end], view[seq_start:seq_end], view[strand_start:strand_end], view[qual_start:qual_end]]
+            if end_of_file:
+                self.__finish()
+            if stop:
+                break
+            leftover = data[newlines[line_count - 1] + 1:] if line_count > 0 else data
+        self.__eof = True
+
     def isEOF(self):
         return False
 
 ################################
 #fastq.writer
 
+class GzipWriterThread(threading.Thread):
+    """Writes the blocks it is handed to a file from a background thread. zlib and isa-l let go of the GIL while they compress, so this runs alongside the code making the reads."""
+
+    def __init__(self, output):
+        threading.Thread.__init__(self, daemon=True)
+        self.output = output
+        self.error = None
+        self.blocks = queue.Queue(maxsize=4) # only hold a few blocks if compressing falls behind
+        self.start()
+
+    def run(self):
+        while True:
+            block = self.blocks.get()
+            try:
+                if block == None:
+                    break
+                if self.error == None: # keep taking blocks after an error so write() never blocks
+                    self.output.write(block)
+                    if block == b"":
+                        self.output.flush() # empty block is a flush
+            except Exception as e:
+                self.error = e
+            finally:
+                self.blocks.task_done()
+
+    def write(self, block):
+        self.check()
+        self.blocks.put(block)
+
+    def flush(self):
+        """Waits until everything handed over so far is written."""
+        self.blocks.put(b"")
+        self.blocks.join()
+        self.check()
+
+    def close(self):
+        self.blocks.put(None)
+        self.join()
+        self.output.close()
+        self.check()
+
+    def check(self):
+        if self.error != None:
+            raise self.error
+
+def open_gzip_writer(fname, level):
+    """Uses isa-l for levels 0-3 when it is installed, it is several times faster than zlib at those levels."""
+    if igzip != None and level <= 3:
+        return igzip.open(fname, "wb", compresslevel=level)
+    return gzip.open(fname, "wb", compresslevel=level)
+
 class Writer:
+    """Collects the reads in a buffer and writes them out about WRITE_BUFFER_SIZE bytes at a time.
+    level is the gzip compression level of .gz files (9 is the smallest, 1-3 are a lot faster for files that only go to the next step)
+    and threaded=True compresses them in a background thread."""
     
     filename = ""
     
     __file = None
     __gz = False
     
-    def __init__(self, fname):
+    def __init__(self, fname, level=9, threaded=False):
         self.filename = fname
+        self.__buffer = bytearray()
+        self.__thread = None
         if self.filename.endswith(".gz"):
             self.__gz = True
-            self.__file = gzip.open(self.filename, "w")
+            self.__file = open_gzip_writer(self.filename, level)
+            if threaded == True:
+                self.__thread = GzipWriterThread(self.__file)
         else:
             self.__gz = False
-            self.__file = open(self.filename, "w")
+            self.__file = open(self.filename, "wb")
         if self.__file == None:
             print("Failed to open file " + self.filename + " to write")
             sys.exit(1)
             
     def __del__(self):
-        if self.__file != None:
-            self.__file.flush()
-            self.__file.close()
+        self.close()
+
+    def __write_buffer(self):
+        if len(self.__buffer) > 0:
+            if self.__thread != None:
+                self.__thread.write(bytes(self.__buffer)) # copy, the thread may still be compressing it when the buffer is reused
+            else:
+                self.__file.write(self.__buffer)
+            self.__buffer.clear()
 
     def flush(self):
         if self.__file !=None:
-            self.__file.flush()
+            self.__write_buffer()
+            if self.__thread != None:
+                self.__thread.flush()
+            else:
+                self.__file.flush()
+
+    def close(self):
+        """Writes out what is left and closes the file, raises the error from the background thread if compressing failed."""
+        if self.__file != None:
+            self.__write_buffer()
+            if self.__thread != None:
+                thread = self.__thread
+                self.__thread = None
+                self.__file = None
+                thread.close()
+            else:
+                self.__file.close()
+                self.__file = None
  
     def writeLines(self, lines):
         if self.__file == None:
             return False
             
         for line in lines:
-            self.__file.write(line+"\n")
+            self.__buffer += as_bytes(line)
+            self.__buffer += b"\n"
+        if len(self.__buffer) >= WRITE_BUFFER_SIZE:
+            self.__write_buffer()
         return True
             
     def writeRead(self, name, seqence, strand, quality):
+        """Takes str, bytes or the memoryviews from Reader.__iter__."""
         if self.__file == None:
             return False
             
-        self.__file.write(name+"\n")
-        self.__file.write(seqence+"\n")
-        self.__file.write(strand+"\n")
-        self.__file.write(quality+"\n")
+        self.__buffer += b"%s\n%s\n%s\n%s\n" % (as_bytes(name), as_bytes(seqence), as_bytes(strand), as_bytes(quality))
+        if len(self.__buffer) >= WRITE_BUFFER_SIZE:
+            self.__write_buffer()
         
-        return True
\ No newline at end of file
+        return True
+
+def as_bytes(line):
+    """The file is written in binary so gzip and plain files work the same, str lines are encoded."""
+    if isinstance(line, str):
+        return line.encode()
+    return line
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+## Times the stages of GRiPHin.py main() on fake PHoeNIx output made by griphin_test_data.py, so changes to GRiPHin can be compared before and after.
+## Each sample count is run in its own process so the peak memory reported is only from that run.
+## Usage: >python griphin_benchmark.py -w benchmark_data --sizes 10,100,1000,5000
+
+import os,sys
+import time
+import json
+import resource
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import GRiPHin
+import GRiPHin
+import griphin_test_data
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to time each stage of GRiPHin.py on fake PHoeNIx output at different numbers of samples.')
+    parser.add_argument('-w', '--workdir', required=True, dest='workdir', help='Folder to make the test data in, trees that are already there are reused.')
+    parser.add_argument('--sizes', default="10,100,1000,5000", required=False, dest='sizes', help='Comma separated numbers of samples to run. Default is 10,100,1000,5000.')
+    parser.add_argument('--phoenix', dest="phoenix", default=False, action='store_true', required=False, help='Time the -entry PHOENIX version of the report rather than CDC_PHOENIX.')
+    parser.add_argument('--low_memory', dest="low_memory", default=False, action='store_true', required=False, help='Time the excel file written with --low_memory.')
+    parser.add_argument('--threads', default=1, type=int, required=False, dest='threads', help='Number of processes GRiPHin.py parses samples with. Default is 1.')
+    parser.add_argument('--json', default=None, required=False, dest='json', help='Also write the results to this json file.')
+    parser.add_argument('--run', default=None, type=int, required=False, dest='run', help=argparse.SUPPRESS) # used internally to time one size in a new process
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+# the first stage runs from the start of GRiPHin.main(), each later one starts the first time main() calls its function and runs until the next one starts
+STAGE_STARTS = [("Create_df", "build_gene_df"), ("Combine_dfs", "Combine_dfs"), ("write_to_excel", "write_to_excel"), ("write_tsv", "write_tsv")]
+STAGES = ["Parse_Samples"] + [name for name, function in STAGE_STARTS]
+
+def reset_peak_rss():
+    """Resets VmHWM on linux so the peak of each stage can be read, returns False where that isn't possible."""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb(since_reset):
+    if since_reset:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) // 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024 # kb on linux, peak since the process started
+
+class StageTimer(object):
+    """Seconds and peak rss of each stage of one GRiPHin.main() run, a stage ends when the next one starts."""
+    def __init__(self):
+        self.results = {}
+        self.current = None
+
+    def start(self, name):
+        """Ends the running stage and starts name, None just ends the running stage."""
+        now = time.perf_counter()
+        if self.current != None:
+            stage, start, since_reset = self.current
+            self.results[stage] = {'seconds': round(now - start, 3), 'peak_rss_mb': peak_rss_mb(since_reset)}
+        self.current = (name, now, reset_peak_rss()) if name != None else None
+
+    def wrap(self, name, function):
+        """function that starts stage name the first time it is called."""
+        def timed(*args, **kwargs):
+            if name not in self.results and (self.current == None or self.current[0] != name):
+                self.start(name)
+            return function(*args, **kwargs)
+        return timed
+
+def time_run(workdir, samples, phoenix, low_memory, threads):
+    """Runs GRiPHin.main() on the tree for this many samples, the same as from the command line, and returns seconds and peak rss for each stage.
+    With more than 1 thread the parsing workers are separate processes, so their memory isn't in the Parse_Samples peak."""
+    data_dir = workdir + "/samples_" + str(samples)
+    timer = StageTimer()
+    for name, function in STAGE_STARTS:
+        setattr(GRiPHin, function, timer.wrap(name, getattr(GRiPHin, function)))
+    sys.argv = ["GRiPHin.py", "-s", data_dir + "/samplesheet.csv", "-a", data_dir + "/ar_db.fasta", "-o", data_dir + "/benchmark", "--threads", str(threads)]
+    if phoenix == True:
+        sys.argv.append("--phoenix")
+    if low_memory == True:
+        sys.argv.append("--low_memory")
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull): # GRiPHin prints a warning for every missing file
+        timer.start("Parse_Samples")
+        GRiPHin.main()
+        timer.start(None)
+    results = timer.results
+    results['total'] = {'seconds': round(sum(results[name]['seconds'] for name in STAGES), 3), 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024}
+    return results
+
+def main():
+    args = parseArgs()
+    workdir = os.path.abspath(args.workdir)
+    if args.run != None: # child process, time one size and hand the results back as json
+        print(json.dumps(time_run(workdir, args.run, args.phoenix, args.low_memory, args.threads)))
+        return
+    all_results = {}
+    print("samples\tstage\tseconds\tpeak_rss_mb")
+    for samples in [int(size) for size in args.sizes.split(",")]:
+        data_dir = workdir + "/samples_" + str(samples)
+        if not os.path.exists(data_dir + "/samplesheet.csv"):
+            griphin_test_data.make_test_data(data_dir, samples)
+        command = [sys.executable, os.path.abspath(__file__), "-w", workdir, "--run", str(samples), "--threads", str(args.threads)]
+        if args.phoenix == True:
+            command.append("--phoenix")
+        if args.low_memory == True:
+            command.append("--low_memory")
+        child = subprocess.run(command, stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        results = json.loads(child.stdout.strip().split("\n")[-1])
+        for name in STAGES + ['total']:
+            print(str(samples) + "\t" + name + "\t" + "{:.3f}".format(results[name]['seconds']) + "\t" + str(results[name]['peak_rss_mb']))
+        sys.stdout.flush()
+        all_results[samples] = results
+    if args.json != None:
+        with open(args.json, 'w') as f:
+            json.dump(all_results, f, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+## Makes a fake PHoeNIx output folder with N samples for testing and benchmarking GRiPHin.py.
+## Each sample gets the files GRiPHin reads (fastp stats, kraken summaries, quast, gamma ar/pf/hv, srst2, mlst, ANI, assembly ratio and GC),
+## with some samples missing files or failing so the warning/alert code paths are used too. The same seed always gives the same tree.
+## Usage: >python griphin_test_data.py -o test_data -n 100
+## then: >python GRiPHin.py -s test_data/samplesheet.csv -a test_data/ar_db.fasta
+
+import os
+import random
+import argparse
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to make a fake PHoeNIx output folder for testing and benchmarking GRiPHin.py.')
+    parser.add_argument('-o', '--outdir', required=True, dest='outdir', help='Folder to make the samples, samplesheet.csv and ar_db.fasta in.')
+    parser.add_argument('-n', '--samples', default=10, type=int, required=False, dest='samples', help='Number of samples to make. Default is 10.')
+    parser.add_argument('--max_hits', default=8, type=int, required=False, dest='max_hits', help='Max number of gamma AR hits per sample. Default is 8.')
+    parser.add_argument('--seed', default=42, type=int, required=False, dest='seed', help='Random seed. Default is 42.')
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+# gene name and conferred resistance
+AR_GENES = [("blaKPC-2_NG_049253.1", "beta-lactam"), ("blaNDM-1_NG_049326.1", "beta-lactam"), ("blaOXA-48_NG_049762.1", "beta-lactam"),
+            ("blaKPC-62_XX_1", "beta-lactam"), ("aac(6')-Ib_NG_052361.1", "aminoglycoside"), ("sul1_NG_048082.1", "sulfonamide"),
+            ("mph(A)_NG_047986.1", "macrolide"), ("tet(A)_NG_048154.1", "tetracycline"), ("qnrB1_NG_050424.1", "quinolone"),
+            ("blaCTX-M-15_NG_048814.1", "beta-lactam"), ("dfrA12_NG_047700.1", "trimethoprim"), ("fosA_NG_047883.1", "fosfomycin")]
+HV_GENES = ["iucA_1", "iroB_1", "rmpA_1", "peg-344_1", "rmpA2_2"]
+PF_GENES = ["IncFIB(K)_1_Kpn3_JN233704", "IncFII_1_pKP91_CP000966", "Col440I_1__CP023920.1", "IncX3_1__JN247852", "rep7a_16_repC(Cassette)_AB037671"]
+GAMMA_HEADER = "Gene\tContig\tStart\tStop\tMatch_Type\tDescription\tCodon_Changes\tBP_Changes\tTransversions\tBP_Percent\tCodon_Percent\tPercent_Length\tMatch_Length\tTarget_Length\tStrand"
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+def make_ar_db(ar_db):
+    """Headers are in the ResGANNCBI format of >number__gene__allele__number__drug."""
+    lines = [">%d__%s__%s__%d__%s ann\nACGT\n" % (i, gene.split("_")[0], gene, i, drug) for i, (gene, drug) in enumerate(AR_GENES)]
+    write_file(ar_db, "".join(lines))
+
+def make_read_stats(d, name, rng):
+    raw_reads = rng.randint(500000, 3000000)
+    write_file(d + "/raw_stats/%s_raw_read_counts.txt" % name,
+        "Name\tR1[reads]\tR1[bp]\tR2[reads]\tR2[bp]\tQ20_Total_[bp]\tQ30_Total_[bp]\tQ20_R1_[bp]\tQ20_R2_[bp]\tQ20_R1_[%]\tQ20_R2_[%]\tQ30_R1_[bp]\tQ30_R2_[bp]\tQ30_R1_[%]\tQ30_R2_[%]\tTotal_Sequenced_[bp]\tTotal_Sequenced_[reads]\n" +
+        "%s\t%d\t%d\t%d\t%d\t1\t1\t1\t1\t0.95\t0.9\t1\t1\t%s\t%s\t%d\t%d" % (name, raw_reads, raw_reads*150, raw_reads, raw_reads*150, round(rng.uniform(0.85, 0.97), 4), round(rng.uniform(0.65, 0.95), 4), raw_reads*300, raw_reads*2))
+    trimmed_reads = int(raw_reads*0.9)
+    write_file(d + "/qc_stats/%s_trimmed_read_counts.txt" % name,
+        "Name\tR1[reads]\tR1[bp]\tR2[reads]\tR2[bp]\tUnpaired[reads]\tUnpaired[bps]\tQ20_Total_[bp]\tQ30_Total_[bp]\tQ20_R1_[bp]\tQ20_R2_[bp]\tQ20_unpaired[bp]\tQ20_R1_[%]\tQ20_R2_[%]\tQ20_unpaired[%]\tQ30_R1_[bp]\tQ30_R2_[bp]\tQ30_unpaired[bp]\tQ30_R1_[%]\tQ30_R2_[%]\tQ30_unpaired[%]\tTotal_Sequenced_[bp]\tPaired_Sequenced_[reads]\tTotal_Sequenced_[reads]\n" +
+        "%s\t%d\t1\t%d\t1\t100\t1\t1\t1\t1\t1\t1\t0.9\t0.9\t0.9\t1\t1\t1\t%s\t%s\t0.9\t%d\t%d\t%d" % (name, trimmed_reads, trimmed_reads, round(rng.uniform(0.88, 0.97), 4), round(rng.uniform(0.68, 0.95), 4), trimmed_reads*280, trimmed_reads*2, trimmed_reads*2+100))
+
+def make_kraken(d, name, rng):
+    genus_percent = round(rng.uniform(60, 99), 2)
+    top_hit = "Taxon level\tMatch percentage\tTaxa\nU: %.2f unclassified\nD: 99.0 Bacteria\nP: 98 Pseudomonadota\nC: 98 Gammaproteobacteria\nO: 97 Enterobacterales\nF: 97 Enterobacteriaceae\nG: %s Klebsiella\ns: %s pneumoniae\n" % (rng.uniform(0, 35), genus_percent, genus_percent - 1)
+    report = " %5.2f\t1000\t1000\tU\t0\tunclassified\n%6.2f\t90000\t10\tR\t1\troot\n %5.2f\t80000\t80000\tG\t570\t    Klebsiella\n %5.2f\t8000\t8000\tG\t561\t    Escherichia\n" % (2.0, 98.0, genus_percent, rng.choice([5.0, 30.0]))
+    write_file(d + "/kraken2_trimd/%s.kraken2_trimd.top_kraken_hit.txt" % name, top_hit)
+    write_file(d + "/kraken2_asmbld_weighted/%s.kraken2_wtasmbld.top_kraken_hit.txt" % name, top_hit)
+    write_file(d + "/kraken2_trimd/%s.kraken2_trimd.summary.txt" % name, report)
+    write_file(d + "/kraken2_asmbld_weighted/%s.kraken2_wtasmbld.summary.txt" % name, report)
+
+def make_mlst(d, name, rng, sample_number):
+    mlst = "Sample\tSource\tPulled_on\tDatabase\tST\tlocus_1\tlocus_2\tlocus_3\n"
+    mlst += "%s\tstandard\t2023-05-04\tkpneumoniae\t%s\tgapA(2)\tinfB(1)\tmdh(1)\n" % (name, rng.choice(["258", "11", "Novel_allele", "-"]))
+    if sample_number % 3 == 0: # some samples get two schemes
+        mlst += "%s\tsrst2\t2023-05-04\tabaumannii(Pasteur)\t2\tcpn60(2)\tfusA(2)\tgltA(2)\n" % name
+        mlst += "%s\tstandard/srst2\t2023-05-04\tabaumannii(Pasteur)\t195\tcpn60(2)\tfusA(3)\tgltA(2)\n" % name
+    write_file(d + "/mlst/%s_combined.tsv" % name, mlst)
+
+def make_gamma(d, name, rng, missing, max_hits):
+    contig = lambda: "%s_%d_length_1000_cov_20" % (name, rng.randint(1, 200))
+    if "gamma_ar" not in missing:
+        rows = [GAMMA_HEADER]
+        for j in range(rng.randint(0, max_hits)):
+            i = rng.randrange(len(AR_GENES))
+            gene, drug = AR_GENES[i]
+            rows.append("%d__%s__%s__%d__%s\t%s\t1\t100\tNative\tx\t0\t0\t0\t%.4f\t%.4f\t%.4f\t100\t100\t+" % (i, gene.split("_")[0], gene, i, drug, contig(), rng.uniform(0.95, 1), rng.choice([1.0, 0.99, 0.97, 0.985]), rng.choice([1.0, 0.95, 0.85, 0.905])))
+        write_file(d + "/gamma_ar/%s_ResGANNCBI_20230517_srst2.gamma" % name, "\n".join(rows) + "\n")
+    if "gamma_hv" not in missing:
+        rows = [GAMMA_HEADER]
+        for j in range(rng.randint(0, 3)):
+            rows.append("%s\t%s\t1\t100\tNative\tx\t0\t0\t0\t%.4f\t%.4f\t%.4f\t100\t100\t+" % (rng.choice(HV_GENES), contig(), rng.uniform(0.9, 1), rng.uniform(0.9, 1), rng.uniform(0.5, 1)))
+        write_file(d + "/gamma_hv/%s_HyperVirulence_20220414.gamma" % name, "\n".join(rows) + "\n")
+    if "gamma_pf" not in missing:
+        rows = ["Gene\tContig\tStart\tStop\tMatch_Percent\tLength_Percent\tMatch_Length\tTarget_Length\tStrand"]
+        for j in range(rng.randint(0, 4)):
+            rows.append("%s\t%s\t1\t100\t%.4f\t%.4f\t100\t100\t+" % (rng.choice(PF_GENES), contig(), rng.choice([1.0, 0.97, 0.93]), rng.choice([1.0, 0.7, 0.5])))
+        write_file(d + "/gamma_pf/%s_PF-Replicons_20240124.gamma" % name, "\n".join(rows) + "\n")
+
+def make_srst2(d, name, rng, sample_number):
+    srst2_file = d + "/srst2/%s__fullgenes__ResGANNCBI_20230517_srst2__results.txt" % name
+    if sample_number % 7 == 0: # empty file
+        write_file(srst2_file, "")
+    elif sample_number % 7 == 1:
+        write_file(srst2_file, "No AR genes found\n")
+    else:
+        rows = ["Sample\tDB\tgene\tallele\tcoverage\tdepth\tdiffs\tuncertainty\tdivergence\tlength\tmaxMAF\tclusterid\tseqid\tannotation"]
+        for i in rng.sample(range(len(AR_GENES)), rng.randint(1, 5)): # srst2 reports an allele once
+            rows.append("%s\tResGANNCBI\tx\t%s\t%.3f\t20\t\t\t%.3f\t100\t0.1\t1\t1\t" % (name, AR_GENES[i][0], rng.choice([100.0, 99.2, 95.0, 85.0]), rng.choice([0.0, 0.5, 1.2, 3.0])))
+        write_file(srst2_file, "\n".join(rows) + "\n")
+
+def make_sample(d, name, rng, sample_number, max_hits):
+    """Makes one sample folder, every 17th and 23rd sample is missing some files."""
+    missing = set()
+    if sample_number % 17 == 5:
+        missing = {"gamma_ar", "srst2", "ani"}
+    if sample_number % 23 == 7:
+        missing = {"gamma_pf", "gamma_hv", "busco", "quast"}
+    make_read_stats(d, name, rng)
+    make_kraken(d, name, rng)
+    if "quast" not in missing:
+        write_file(d + "/quast/%s_summary.tsv" % name, "Assembly\t%s\n# contigs (>= 0 bp)\t%d\nTotal length\t%d\n" % (name, rng.randint(40, 400), rng.randint(5000000, 5800000)))
+    make_mlst(d, name, rng, sample_number)
+    fairy = "PASSED: File %s_R1.fastq.gz is not corrupt.\n" % name
+    if sample_number % 29 == 3:
+        fairy += "FAILED: The number of reads in R1/R2 are NOT the same!\n"
+    write_file(d + "/file_integrity/%s_summary.txt" % name, fairy)
+    if "busco" not in missing:
+        write_file(d + "/BUSCO/short_summary.specific.enterobacterales_odb10.%s.filtered.scaffolds.fa.txt" % name,
+            "# The lineage dataset is: enterobacterales_odb10 (Creation date: 2020-03-06)\n\t%d\tComplete BUSCOs (C)\n\t440\tTotal BUSCO groups searched\n" % rng.randint(420, 440))
+    write_file(d + "/%s_Assembly_ratio_20230504.txt" % name, "Tax: Klebsiella pneumoniae\nNCBI_TAXID: 573\nSpecies_StDev: 1\nIsolate_St.Devs: %s\nActual_length: 1\nExpected_length: 1\nRatio: %.4f\n" % (rng.choice(["0.5", "NA", "3.1"]), rng.uniform(0.9, 1.1)))
+    write_file(d + "/%s_GC_content_20230504.txt" % name, "Tax: Klebsiella pneumoniae\nNCBI_TAXID: 573\nSpecies_GC_StDev: %s\nSpecies_GC_Min: 1\nSpecies_GC_Max: 1\nSpecies_GC_Mean: 57.2\nSpecies_GC_Count: 100\nSample_GC_Percent: %.2f\n" % (rng.choice(["0.2", "Not calculated on species with n<10 references"]), rng.uniform(56, 58)))
+    write_file(d + "/%s.tax" % name, "ANI_REFSEQ\t99\tKlebsiella pneumoniae\nK:\t2\tBacteria\n")
+    if "ani" not in missing:
+        if sample_number % 11 == 4:
+            ani = "Mash/FastANI Not run. No MASH hit found\n"
+        else:
+            ani = "Sample\t%% ID\t%% Coverage\tOrganism\tSource File\n%s\t%.2f\t%.2f\tKlebsiella pneumoniae-chromosome\tKlebsiella_pneumoniae_GCF_000240185.1_ASM24018v2_genomic.fna.gz\n" % (name, rng.uniform(94, 99.9), rng.uniform(85, 95))
+        write_file(d + "/ANI/%s_REFSEQ_20230504.fastANI.txt" % name, ani)
+    make_gamma(d, name, rng, missing, max_hits)
+    if "srst2" not in missing:
+        make_srst2(d, name, rng, sample_number)
+
+def make_test_data(outdir, samples, max_hits=8, seed=42):
+    """Makes outdir/ar_db.fasta, outdir/samplesheet.csv and the samples under outdir/PROJECT/run/. Returns the samplesheet path."""
+    rng = random.Random(seed)
+    outdir = os.path.abspath(outdir)
+    make_ar_db(outdir + "/ar_db.fasta")
+    run_folder = outdir + "/PROJECT/run"
+    samplesheet = outdir + "/samplesheet.csv"
+    with open(samplesheet, 'w') as f:
+        f.write("sample,directory\n")
+        for sample_number in range(samples):
+            name = "S%05d" % (sample_number + 1)
+            make_sample(run_folder + "/" + name, name, rng, sample_number, max_hits)
+            f.write(name + "," + run_folder + "/" + name + "\n")
+    return samplesheet
+
+def main():
+    args = parseArgs()
+    samplesheet = make_test_data(args.outdir, args.samples, args.max_hits, args.seed)
+    print("Made " + str(args.samples) + " samples, samplesheet is " + samplesheet)
+
+if __name__ == '__main__':
+    main()
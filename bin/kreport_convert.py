@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+## Reads a kraken2 report once and writes the krona text (kreport2krona.py), mpa file (kreport2mpa.py) and top kraken hit summary (kraken2_best_hit.sh) from it,
+## instead of each of those reading and splitting the report again. Outputs are the same as those scripts (krakentools 1.2, kraken2_best_hit.sh 2.0) with their defaults (no intermediate ranks, read counts, no header).
+## Usage: >python kreport_convert.py -r sample.kraken2_trimd.summary.txt -k sample_trimd.krona -m sample.mpa -b sample.kraken2_trimd.top_kraken_hit.txt
+## Weighted reports (make_kreport.py): >python kreport_convert.py -r sample.kraken2_wtasmbld.summary.txt -k sample_wtasmbld.krona -b sample.kraken2_wtasmbld.top_kraken_hit.txt --weighted
+
+import sys
+import argparse
+from decimal import Decimal
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to convert a kraken2 report to krona text, mpa format and the top kraken hit summary in one pass.')
+    parser.add_argument('-r', '--report', required=True, dest='report', help='Kraken2 report (.summary.txt) to convert.')
+    parser.add_argument('-k', '--krona', required=False, default=None, dest='krona', help='Krona text file to write, same as kreport2krona.py.')
+    parser.add_argument('-m', '--mpa', required=False, default=None, dest='mpa', help='mpa file to write, same as kreport2mpa.py.')
+    parser.add_argument('-b', '--best_hit', required=False, default=None, dest='best_hit', help='Top kraken hit summary to write, same as kraken2_best_hit.sh.')
+    parser.add_argument('--weighted', action='store_true', default=False, dest='weighted', help='Report is weighted by contig length (wtasmbld), percentages in the top hit summary are scaled to unclassified + root.')
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+# main ranks kept by kreport2krona.py and kreport2mpa.py, everything else is an intermediate rank (x)
+KRONA_LEVELS = ['D','P','C','O','F','G','S']
+MPA_LEVELS = ['R','K','D','P','C','O','F','G','S']
+TYPE2MAIN = {'superkingdom':'D','phylum':'P','class':'C','order':'O','family':'F','genus':'G','species':'S'}
+# levels kraken2_best_hit.sh keeps the entry with the most reads for, in the order they are written
+BEST_HIT_LEVELS = ['D','P','C','O','F']
+
+def parse_report_line(line):
+    """Splits a report line into a dictionary of the fields the three outputs use, or None for header lines.
+    Rank for krona is the 3rd column from the end (like kreport2krona.py), for mpa and the top hit it is the 4th column."""
+    split_str = line.strip().split('\t')
+    if len(split_str) < 2:
+        return None
+    try:
+        all_reads = int(split_str[1])
+    except ValueError:
+        return None
+    name = split_str[-1]
+    spaces = len(name) - len(name.lstrip(' ')) # names are indented 2 spaces per level
+    krona_type = split_str[-3]
+    if len(krona_type) > 1:
+        krona_type = TYPE2MAIN.get(krona_type, '-')
+    words = line.split() # kraken2_best_hit.sh splits on any whitespace
+    return {'all_reads': all_reads, 'lvl_reads': int(split_str[2]), 'rank': split_str[3], 'krona_rank': krona_type,
+            'name': name[spaces:].replace(' ','_'), 'level_num': spaces/2, 'percent': words[0], 'description': " ".join(words[5:])}
+
+def read_report(report):
+    with open(report, 'r') as f:
+        return [parse_report_line(line) for line in f]
+
+def krona_lines(rows):
+    """Same as kreport2krona_main, intermediate ranks add their reads to the closest main rank above them."""
+    curr_path = []
+    prev_lvl_num = -1
+    num2path = {}
+    path2reads = {}
+    for line_num, row in enumerate(rows):
+        if row == None:
+            continue
+        level_type = row['krona_rank']
+        if level_type == 'U':
+            num2path[line_num] = ["Unclassified"]
+            path2reads["Unclassified"] = row['lvl_reads']
+            continue
+        if level_type not in KRONA_LEVELS:
+            level_type = "x"
+        elif level_type == "D":
+            level_type = "K"
+        level_str = level_type.lower() + "__" + row['name']
+        if prev_lvl_num == -1:
+            # first level
+            prev_lvl_num = row['level_num']
+            curr_path.append(level_str)
+            if level_type == "x":
+                num2path[line_num] = ""
+            else:
+                path2reads[level_str] = row['lvl_reads']
+                num2path[line_num] = list(curr_path)
+            continue
+        # move back if needed
+        while row['level_num'] != (prev_lvl_num + 1):
+            prev_lvl_num -= 1
+            curr_path.pop()
+        curr_path.append(level_str)
+        prev_lvl_num = row['level_num']
+        if level_type == "x":
+            for ancestor in reversed(curr_path):
+                if ancestor[0] != "x":
+                    path2reads[ancestor] += row['lvl_reads']
+                    break
+            num2path[line_num] = ""
+        else:
+            path2reads[level_str] = row['lvl_reads']
+            num2path[line_num] = list(curr_path)
+    lines = []
+    for line_num in sorted(num2path):
+        curr_path = num2path[line_num]
+        if len(curr_path) > 0:
+            lines.append("%i" % path2reads[curr_path[-1]] + "".join("\t" + name for name in curr_path if name[0] != "r" and name[0] != "x") + "\n")
+    return lines
+
+def mpa_lines(rows):
+    """Same as kreport2mpa.py with its defaults, read counts of the main ranks with the path of main ranks above them."""
+    curr_path = []
+    prev_lvl_num = -1
+    lines = []
+    for row in rows:
+        if row == None or row['rank'] == 'U':
+            continue
+        level_type = row['rank']
+        if level_type not in MPA_LEVELS:
+            level_type = "x"
+        elif level_type == "D":
+            level_type = "k"
+        level_str = level_type.lower() + "__" + row['name']
+        if prev_lvl_num != -1:
+            # move back if needed
+            while row['level_num'] != (prev_lvl_num + 1):
+                prev_lvl_num -= 1
+                curr_path.pop()
+            if level_type != "x":
+                lines.append("".join(string + "|" for string in curr_path if string[0] != "x" and string[0] != "r") + level_str + "\t" + str(row['all_reads']) + "\n")
+        curr_path.append(level_str)
+        prev_lvl_num = row['level_num']
+    return lines
+
+def best_hit_lines(rows, weighted=False):
+    """Same as kraken2_best_hit.sh, the entry with the most reads at each rank, and the species with the most reads inside the top genus."""
+    unclass_percent = root_percent = "0"
+    best = {level: ["0", "N/A", 0] for level in BEST_HIT_LEVELS + ['G', 'S']} # percent, name, reads
+    top_genus = current_genus = ""
+    for row in rows:
+        if row == None:
+            continue
+        classification = row['rank']
+        reads = row['all_reads']
+        description = row['description'][:1].upper() + row['description'][1:] # bash ${description^}
+        if classification == "U":
+            unclass_percent = row['percent']
+        elif classification == "R" or (classification == "-" and row['description'].split(" ")[0] == "root"):
+            root_percent = row['percent']
+        elif classification in BEST_HIT_LEVELS:
+            if reads > best[classification][2]:
+                best[classification] = [row['percent'], description, reads]
+        elif classification == "G":
+            current_genus = description
+            if reads > best['G'][2]:
+                top_genus = description
+                best['G'] = [row['percent'], description, reads]
+        elif classification == "S" and reads > best['S'][2] and current_genus == top_genus:
+            best['S'] = [row['percent'], " ".join(description.split(" ")[1:]), reads]
+    if weighted:
+        # percentages of the weighted report are scaled to unclassified + root, summed like bc does
+        total_percent = float(Decimal(unclass_percent) + Decimal(root_percent))
+        if total_percent != 0:
+            unclass_percent = "%2.2f" % (float(unclass_percent)*100/total_percent)
+            for level in best:
+                best[level][0] = "%2.2f" % (float(best[level][0])*100/total_percent)
+    lines = ["Taxon level\tMatch percentage\tTaxa\n", "U: " + unclass_percent + " unclassified\n"]
+    for level in BEST_HIT_LEVELS:
+        lines.append(level + ": " + best[level][0] + " " + best[level][1] + "\n")
+    lines.append("G: " + best['G'][0] + " " + top_genus + "\n")
+    lines.append("s: " + best['S'][0] + " " + best['S'][1] + "\n")
+    return lines
+
+def write_lines(out_file, lines):
+    with open(out_file, 'w') as f:
+        f.writelines(lines)
+
+def main():
+    args = parseArgs()
+    if args.krona == None and args.mpa == None and args.best_hit == None:
+        sys.exit("Error: Give at least one of -k, -m or -b to write.")
+    rows = read_report(args.report)
+    if args.krona != None:
+        write_lines(args.krona, krona_lines(rows))
+    if args.mpa != None:
+        write_lines(args.mpa, mpa_lines(rows))
+    if args.best_hit != None:
+        write_lines(args.best_hit, best_hit_lines(rows, args.weighted))
+
+if __name__ == '__main__':
+    main()
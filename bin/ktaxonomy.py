@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+## Compiles the kraken2 database ktaxonomy.tsv (from make_ktaxonomy.py) into numpy arrays for make_kreport.py.
+## The arrays are saved next to the taxonomy as <ktaxonomy.tsv>.npz along with the size, mtime and md5 of the tsv,
+## so every sample after the first loads them instead of splitting the text again. The md5 is only worked out when the size or mtime changed.
+## Usage: >python ktaxonomy.py -t ktaxonomy.tsv
+
+import os,sys
+import argparse
+import numpy as np
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import ar_dictionary
+from ar_dictionary import file_checksum, file_stamp
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to compile a kraken2 ktaxonomy.tsv into the arrays make_kreport.py loads.')
+    parser.add_argument('-t', '--taxonomy', required=True, dest='tax_file', help='ktaxonomy.tsv from the kraken2 database.')
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+# arrays saved in the cache, names are saved as one newline separated string table
+ARRAYS = ['taxids', 'parents', 'ranks', 'depths', 'sort_order', 'children', 'child_start']
+
+class Taxonomy(object):
+    """Taxonomy tree kept as arrays, node i is row i of each array in the order of the taxonomy file (make_ktaxonomy.py writes every parent before its children).
+    Children of node i are children[child_start[i]:child_start[i+1]], in file order."""
+    def __init__(self, arrays, names):
+        for key in ARRAYS:
+            setattr(self, key, arrays[key])
+        self.names = names
+
+    def __len__(self):
+        return len(self.taxids)
+
+    def index(self, taxids):
+        """Rows of an array of taxids, exits if one is not in the taxonomy."""
+        rows = self.sort_order[np.searchsorted(self.taxids, taxids, sorter=self.sort_order).clip(0, len(self.taxids) - 1)]
+        missing = self.taxids[rows] != taxids
+        if missing.any():
+            sys.stderr.write("Error: taxid %i is not in the taxonomy file\n" % taxids[missing][0])
+            sys.exit(1)
+        return rows
+
+    def clade_counts(self, counts):
+        """Adds the counts of each node to all of its parents, one level at a time from the deepest up."""
+        all_counts = counts.copy()
+        by_depth = np.argsort(self.depths, kind='stable')
+        level_start = np.searchsorted(self.depths[by_depth], np.arange(self.depths.max() + 2))
+        for depth in range(self.depths.max(), 0, -1):
+            nodes = by_depth[level_start[depth]:level_start[depth + 1]]
+            np.add.at(all_counts, self.parents[nodes], all_counts[nodes])
+        return all_counts
+
+    def report_children(self, all_counts):
+        """Children with reads of every node sorted by clade count (ties in file order), laid out like children/child_start."""
+        children = self.children[all_counts[self.children] > 0]
+        children = children[np.lexsort((all_counts[children], self.parents[children]))]
+        return children, np.searchsorted(self.parents[children], np.arange(len(self.taxids) + 1))
+
+def cache_file(tax_file):
+    return tax_file + ".npz"
+
+def read_taxonomy(tax_file):
+    """Parses the taxid | parent taxid | rank | level number | name lines of the taxonomy file."""
+    taxids = []
+    p_taxids = []
+    ranks = []
+    level_nums = []
+    names = []
+    with open(tax_file, 'r') as f:
+        for line in f:
+            [taxid, p_tid, rank, lvl_num, name] = line.strip().split('\t|\t')
+            taxids.append(int(taxid))
+            p_taxids.append(int(p_tid))
+            ranks.append(rank)
+            level_nums.append(int(lvl_num))
+            names.append(name)
+    arrays = {'taxids': np.array(taxids, dtype=np.int64), 'ranks': np.array(ranks)}
+    arrays['depths'] = np.array(level_nums, dtype=np.int32) # level number is the depth of the node, root is 0
+    arrays['sort_order'] = np.argsort(arrays['taxids'], kind='stable')
+    arrays['parents'] = np.full(len(taxids), -1, dtype=np.int64) # parent row of each node, -1 for the root
+    arrays['children'] = arrays['child_start'] = None
+    taxonomy = Taxonomy(arrays, names)
+    not_root = taxonomy.taxids != 1
+    taxonomy.parents[not_root] = taxonomy.index(np.array(p_taxids, dtype=np.int64)[not_root])
+    has_parent = np.flatnonzero(taxonomy.parents >= 0)
+    taxonomy.children = has_parent[np.argsort(taxonomy.parents[has_parent], kind='stable')]
+    taxonomy.child_start = np.searchsorted(taxonomy.parents[taxonomy.children], np.arange(len(taxids) + 1))
+    return taxonomy
+
+def write_cache(tax_file, stamp, checksum, taxonomy):
+    """Saves the arrays next to the taxonomy. The database folder might not be writable (containers) so this is skipped if it fails."""
+    cache = cache_file(tax_file)
+    tmp_cache = cache + "." + str(os.getpid()) + ".tmp" # write to a temp file first so another process never reads half a cache
+    names = np.frombuffer("\n".join(taxonomy.names).encode(), dtype=np.uint8)
+    try:
+        with open(tmp_cache, 'wb') as f: # a file object so savez doesn't add .npz to the temp name
+            np.savez(f, stamp=np.array(stamp, dtype=np.int64), md5=np.array(checksum), names=names, **{key: getattr(taxonomy, key) for key in ARRAYS})
+        os.replace(tmp_cache, cache)
+    except OSError:
+        if os.path.exists(tmp_cache):
+            os.remove(tmp_cache)
+        print("Warning: Couldn't write " + cache + ", the taxonomy will be read again next time.")
+
+def load_taxonomy(tax_file):
+    """Returns the Taxonomy for tax_file, using the saved arrays if they match the taxonomy's size and mtime, or its md5 when those changed (e.g. a copied database)."""
+    stamp = file_stamp(tax_file)
+    checksum = None
+    try:
+        with np.load(cache_file(tax_file)) as cache:
+            if cache['stamp'].tolist() == stamp:
+                return Taxonomy({key: cache[key] for key in ARRAYS}, cache['names'].tobytes().decode().split("\n"))
+            checksum = file_checksum(tax_file)
+            if str(cache['md5']) == checksum:
+                taxonomy = Taxonomy({key: cache[key] for key in ARRAYS}, cache['names'].tobytes().decode().split("\n"))
+                write_cache(tax_file, stamp, checksum, taxonomy) # same taxonomy, save the new stamp so the md5 isn't needed next time
+                return taxonomy
+    except (OSError, ValueError, KeyError):
+        pass # no cache yet, it is unreadable or from before stamps were saved, just rebuild it
+    taxonomy = read_taxonomy(tax_file)
+    write_cache(tax_file, stamp, checksum or file_checksum(tax_file), taxonomy)
+    return taxonomy
+
+def main():
+    args = parseArgs()
+    taxonomy = load_taxonomy(args.tax_file)
+    print("Compiled " + str(len(taxonomy)) + " taxonomy nodes from " + args.tax_file + " in " + cache_file(args.tax_file))
+
+if __name__ == '__main__':
+    main()
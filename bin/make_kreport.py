@@ -33,31 +33,100 @@
 #   -h, --help..........................show help message.
 #################################################################################
 import os, sys, argparse
-import operator
+import numpy as np
 from time import gmtime
 from time import strftime 
+from time import monotonic
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import ktaxonomy
+from ktaxonomy import load_taxonomy
 #################################################################################
-#Tree Class
-#usage: tree node used in constructing taxonomy tree
-class Tree(object):
-    'Tree node.'
-    def __init__(self,  taxid, name, level_rank, level_num, p_taxid, parent=None,children=None):
-        self.taxid = taxid
-        self.name = name
-        self.level_rank= level_rank
-        self.level_num = int(level_num)
-        self.p_taxid = p_taxid
-        self.all_reads = 0
-        self.lvl_reads = 0
-        #Parent/children attributes
-        self.children = []
-        self.parent = parent
-        if children is not None:
-            for child in children:
-                self.add_child(child)
-    def add_child(self, node):
-        assert isinstance(node,Tree)
-        self.children.append(node)
+#Kraken Output Parsing
+#usage: the taxid (3rd) and length (4th) columns of a block of whole lines are
+#pulled into arrays from the bytes, without splitting each line in python
+BLOCK_SIZE = 1024*1024
+PROGRESS_SECONDS = 1
+#report lines held before each write
+WRITE_LINES = 10000
+def read_blocks(k_file):
+    'Blocks of whole lines from a file opened as binary.'
+    rest = b''
+    while True:
+        block = k_file.read(BLOCK_SIZE)
+        if not block:
+            break
+        block = rest + block
+        cut = block.rfind(b'\n') + 1
+        rest = block[cut:]
+        if cut > 0:
+            yield block[:cut]
+    #last line without a newline
+    if rest.strip():
+        yield rest + b'\n'
+def parse_ints(chars, starts, ends):
+    'Numbers in chars[starts[i]:ends[i]], None if one is empty or not all digits.'
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if (ends <= starts).any():
+        return None
+    #digits of each number right aligned in a row, zero padded on the left
+    width = (ends - starts).max()
+    pos = ends[:,None] - np.arange(width, 0, -1)
+    digits = chars[pos] - np.uint8(48)
+    digits[pos < starts[:,None]] = 0
+    #anything that is not a digit wraps around to more than 9
+    if (digits > 9).any():
+        return None
+    return digits.astype(np.int64) @ 10**np.arange(width - 1, -1, -1, dtype=np.int64)
+def parse_kraken_block(block, use_read_len):
+    'Taxid and count of each line in a block, None if the lines are not plain 5 column kraken output.'
+    chars = np.frombuffer(block, dtype=np.uint8)
+    line_ends = np.flatnonzero(chars == 10)
+    tabs = np.flatnonzero(chars == 9)
+    if len(tabs) != 4*len(line_ends):
+        return None
+    tabs = tabs.reshape(-1, 4)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    if (tabs[:,0] < line_starts).any() or (tabs[:,3] > line_ends).any():
+        return None
+    taxids = parse_ints(chars, tabs[:,1] + 1, tabs[:,2])
+    if taxids is None:
+        return None
+    if not use_read_len:
+        return taxids, np.ones(len(taxids), dtype=np.int64)
+    #read lengths are "len" or "len1|len2" for pairs, the 5th column has |:| in it too
+    starts = tabs[:,2] + 1
+    ends = tabs[:,3].copy()
+    pipes = np.flatnonzero(chars == 124)
+    pipe_lines = np.searchsorted(ends, pipes).clip(0, len(ends) - 1)
+    in_length = (pipes > starts[pipe_lines]) & (pipes < ends[pipe_lines])
+    pipes, pipe_lines = pipes[in_length], pipe_lines[in_length]
+    if len(np.unique(pipe_lines)) != len(pipe_lines):
+        return None
+    ends[pipe_lines] = pipes
+    counts = parse_ints(chars, starts, ends)
+    second_counts = parse_ints(chars, pipes + 1, tabs[pipe_lines,3])
+    if counts is None or second_counts is None:
+        return None
+    counts[pipe_lines] += second_counts
+    return taxids, counts
+def parse_kraken_lines(block, use_read_len):
+    'Same as parse_kraken_block one line at a time, for blocks it can not take.'
+    taxids = []
+    counts = []
+    for line in block.decode().split('\n')[:-1]:
+        l_vals = line.strip().split('\t')
+        taxids.append(int(l_vals[2]))
+        count = 1
+        #If using read length instead of read counts
+        if use_read_len:
+            if '|' in l_vals[3]:
+                [len1,len2] = l_vals[3].split('|')
+                count = int(len1)+int(len2)
+            else:
+                count = int(l_vals[3])
+        counts.append(count)
+    return np.array(taxids, dtype=np.int64), np.array(counts, dtype=np.int64)
 #################################################################################
 #Main method
 def main():
@@ -79,115 +148,71 @@ def main():
     sys.stdout.write("PROGRAM START TIME: " + time + '\n')
 
     #STEP 1/4: READ TAXONOMY FILE  
-    count_nodes = 0
     sys.stdout.write(">> STEP 1/4: Reading taxonomy %s...\n" % args.tax_file)
-    sys.stdout.write("\t%i nodes saved" % (count_nodes))
-    #Parse taxonomy file 
-    root_node = -1
-    taxid2node = {}
-    t_file = open(args.tax_file,'r')
-    for line in t_file:
-        count_nodes += 1
-        sys.stdout.write("\r\t%i nodes saved" % (count_nodes))
-        sys.stdout.flush()
-        [taxid, p_tid, rank, lvl_num, name] = line.strip().split('\t|\t')
-        curr_node = Tree(taxid, name, rank, lvl_num, p_tid)
-        taxid2node[taxid] = curr_node
-        #set parent/kids
-        if taxid == "1":
-            root_node = curr_node
-        else:
-            curr_node.parent = taxid2node[p_tid]
-            taxid2node[p_tid].add_child(curr_node)
-    t_file.close()
-    sys.stdout.write("\r\t%i nodes saved\n" % (count_nodes))
+    #arrays compiled by ktaxonomy.py are loaded from <taxonomy>.npz when they match the file
+    taxonomy = load_taxonomy(args.tax_file)
+    root_node = int(np.flatnonzero(taxonomy.taxids == 1)[0])
+    sys.stdout.write("\t%i nodes saved\n" % (len(taxonomy)))
     sys.stdout.flush()
     #STEP 2/4: READ KRAKEN FILE FOR COUNTS PER TAXID
     read_count = 0
     sys.stdout.write(">> STEP 2/4: Reading kraken file %s...\n" % args.kraken_file)
     sys.stdout.write("\t%i million reads processed" % read_count)
     sys.stdout.flush()
-    #Save counts per taxid
-    taxid2counts = {}
-    taxid2allcounts = {} 
-    k_file = open(args.kraken_file,'r')
-    for line in k_file:
-        read_count += 1
-        if read_count % 1000 == 0:
+    #Save counts per taxonomy row, unclassified stays None if there are no taxid 0 reads
+    lvl_counts = np.zeros(len(taxonomy), dtype=np.int64)
+    unclassified = None
+    last_progress = monotonic()
+    k_file = open(args.kraken_file,'rb')
+    for block in read_blocks(k_file):
+        parsed = parse_kraken_block(block, args.use_read_len)
+        if parsed is None:
+            parsed = parse_kraken_lines(block, args.use_read_len)
+        taxids, counts = parsed
+        read_count += len(taxids)
+        #float weights are exact for sums below 2**53
+        block_taxids, rows = np.unique(taxids, return_inverse=True)
+        block_counts = np.bincount(rows, weights=counts, minlength=len(block_taxids)).round().astype(np.int64)
+        if len(block_taxids) > 0 and block_taxids[0] == 0:
+            unclassified = (unclassified or 0) + int(block_counts[0])
+            block_taxids, block_counts = block_taxids[1:], block_counts[1:]
+        lvl_counts[taxonomy.index(block_taxids)] += block_counts
+        if monotonic() - last_progress >= PROGRESS_SECONDS:
+            last_progress = monotonic()
             sys.stdout.write('\r\t%0.3f million reads processed' % float(read_count/1000000.))
             sys.stdout.flush()
-        l_vals = line.strip().split('\t')
-        taxid = l_vals[2]
-        count = 1
-        #If using read length instead of read counts
-        if args.use_read_len:
-            if '|' in l_vals[3]:
-                [len1,len2] = l_vals[3].split('|')
-                count = int(len1)+int(len2)
-            else:
-                count = int(l_vals[3])
-        #add to dictionaries 
-        if taxid not in taxid2counts:
-            taxid2counts[taxid] = count
-            taxid2allcounts[taxid] = count
-        else:
-            taxid2counts[taxid] += count
-            taxid2allcounts[taxid] += count
     k_file.close()
     sys.stdout.write('\r\t%0.3f million reads processed\n' % float(read_count/1000000.))
     sys.stdout.flush()
     #STEP 3/4: FOR EVERY TAXID PARSED, ADD UP TOTAL READS
     sys.stdout.write(">> STEP 3/4: Creating final tree...\n")
-    for curr_tid in taxid2counts:
-        #Skip unclassified
-        if curr_tid == '0':
-            continue 
-        p_node = taxid2node[curr_tid].parent 
-        add_counts = taxid2counts[curr_tid] 
-        #Assign reads for node
-        taxid2node[curr_tid].lvl_reads += add_counts 
-        taxid2node[curr_tid].all_reads += add_counts 
-        while (p_node != None):
-            #Add child reads to parent node 
-            p_taxid = p_node.taxid
-            if p_taxid not in taxid2allcounts:
-                taxid2allcounts[p_taxid] = add_counts
-            else:
-                taxid2allcounts[p_taxid] += add_counts
-            p_node.all_reads += add_counts
-            #Get next parent node
-            p_node = p_node.parent
+    all_counts = taxonomy.clade_counts(lvl_counts)
     #STEP 4/4: PRINT REPORT FILE 
     sys.stdout.write(">> STEP 4/4: Printing report file to %s...\n" % args.out_file)
     o_file = open(args.out_file,'w')
     #Write line for unclassified reads:
-    if '0'  in taxid2counts:
-        o_file.write("%6.2f\t" % (float(taxid2counts['0'])/float(read_count)*100))
-        o_file.write("%i\t%i\t" % (taxid2counts['0'],taxid2counts['0']))
+    if unclassified is not None:
+        o_file.write("%6.2f\t" % (float(unclassified)/float(read_count)*100))
+        o_file.write("%i\t%i\t" % (unclassified,unclassified))
         o_file.write('U\t0\tunclassified\n')
-    #Get remaining lines 
+    #Get remaining lines, children go on the stack smallest first so the largest comes off next
+    children, child_start = taxonomy.report_children(all_counts)
+    children, child_start = children.tolist(), child_start.tolist()
+    all_reads, lvl_reads = all_counts.tolist(), lvl_counts.tolist()
+    ranks, taxids, depths, names = taxonomy.ranks.tolist(), taxonomy.taxids.tolist(), taxonomy.depths.tolist(), taxonomy.names
     parse_nodes = [root_node]
+    lines = []
     while len(parse_nodes) > 0:
-        curr_node = parse_nodes.pop(0)
-        curr_tid = curr_node.taxid 
+        curr_node = parse_nodes.pop()
         #Print information for this level
-        o_file.write("%6.2f\t" % (float(taxid2allcounts[curr_tid])/float(read_count)*100))
-        o_file.write("%i\t" % taxid2allcounts[curr_tid])
-        if curr_tid not in taxid2counts:
-            o_file.write("0\t")
-        else:
-            o_file.write("%i\t" % taxid2counts[curr_tid])
-        o_file.write("%s\t" % curr_node.level_rank)
-        o_file.write("%s\t" % curr_tid)
-        o_file.write(" "*curr_node.level_num*2 + curr_node.name + "\n")
+        lines.append("%6.2f\t%i\t%i\t%s\t%i\t%s%s\n" % (float(all_reads[curr_node])/float(read_count)*100, all_reads[curr_node],
+            lvl_reads[curr_node], ranks[curr_node], taxids[curr_node], " "*depths[curr_node]*2, names[curr_node]))
+        if len(lines) == WRITE_LINES:
+            o_file.write("".join(lines))
+            lines = []
         #Add children to list
-        for child in sorted(curr_node.children, key=operator.attrgetter('all_reads')):
-            if child.taxid not in taxid2allcounts:
-                continue
-            if taxid2allcounts[child.taxid] == 0:
-                continue
-            #Add to list 
-            parse_nodes.insert(0,child)    
+        parse_nodes.extend(children[child_start[curr_node]:child_start[curr_node + 1]])
+    o_file.write("".join(lines))
     o_file.close() 
     #End of program
     time = strftime("%m-%d-%Y %H:%M:%S", gmtime())
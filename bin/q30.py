@@ -8,8 +8,14 @@ import os,sys
 #disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
 sys.dont_write_bytecode = True # needs to be before the import fastq
 import fastq
+import fairy
+import create_raw_stats_output
 import time
 import argparse
+import itertools
+import gc
+import json
+import numpy as np
 
 # Function to get the script version
 def get_version():
@@ -19,48 +25,209 @@ def parseArgs(args=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
     parser.add_argument('-i', '--input', dest='input', required=False, help='input fasta filename')
+    parser.add_argument('-1', '--r1', dest='r1', required=False, help='R1 fastq filename, counted alongside -2 to make <name>_raw_read_counts.txt.')
+    parser.add_argument('-2', '--r2', dest='r2', required=False, help='R2 fastq filename, counted alongside -1 to make <name>_raw_read_counts.txt.')
+    parser.add_argument('-n', '--name', dest='name', required=False, help='Sample name, needed with -1 and -2.')
+    parser.add_argument('-f', '--fairy_summary', dest='fairy_summary', required=False, help='*_summary_old.txt from fairy, if given the R1/R2 read counts are checked and the outcome added to it like fairy.py -r does.')
+    parser.add_argument('--busco', dest='busco', default=False, action='store_true', required=False, help='Passed on to the fairy check when -f is given.')
+    parser.add_argument('-j', '--qc_json', dest='qc_json', required=False, help='Also write the per cycle mean quality, read length counts and per cycle base counts to this json file. With -1 and -2 it has an R1 and an R2 section.')
+    parser.add_argument('--decompress', dest='decompress', default="auto", choices=fastq.DECOMPRESSORS, required=False, help='How to decompress .gz input. thread, pigz and isal decompress alongside the counting, auto picks pigz, isal or thread based on what is installed and plain gzip if there is only one cpu. Default is auto.')
     parser.add_argument('files', nargs=argparse.REMAINDER)
     return parser.parse_args()
 
+# number of reads whose quality lines are joined and counted together
+BATCH_SIZE = 100000
+
 def qual_stat(qstr):
-    q20 = 0
-    q30 = 0
-    for q in qstr:
-        qual = ord(chr(q)) - 33
-        #qual = ord(q) - 33 #python2 version
-        if qual >= 30:
-            q30 += 1
-            q20 += 1
-        elif qual >= 20:
-            q20 += 1
+    """Counts the Q20 and Q30 bases in a quality string, or in many of them joined together."""
+    if isinstance(qstr, str): # uncompressed files are read as text
+        qstr = qstr.encode()
+    # count each quality character once, then phred+33 scores >= 20 start at '5' (53) and >= 30 at '?' (63)
+    qual_counts = np.bincount(np.frombuffer(qstr, dtype=np.uint8), minlength=256)
+    q20 = int(qual_counts[20 + 33:].sum())
+    q30 = int(qual_counts[30 + 33:].sum())
     return q20, q30
 
-def stat(filename):
-    reader = fastq.Reader(filename)
-    total_read_count = 0
-    total_base_count = 0
-    q20_count = 0
-    q30_count = 0
-    while True:
-        read = reader.nextRead()
-        if read == None:
-            break
-        total_read_count = total_read_count + 1
-        total_base_count += len(read[3])
-        q20, q30 = qual_stat(read[3])
-        q20_count += q20
-        q30_count += q30
-
-    print("total reads:", total_read_count)
-    print("total bases:", total_base_count)
-    print("q20 bases:", q20_count)
-    print("q30 bases:", q30_count)
-    print("q20 percents:", 100 * float(q20_count)/float(total_base_count))
-    print("q30 percents:", 100 * float(q30_count)/float(total_base_count))
+def batch_stat(quals):
+    """Joins a list of quality lines and returns the number of bases, Q20 bases and Q30 bases in them."""
+    batch = b"".join(quals)
+    q20, q30 = qual_stat(batch)
+    return len(batch), q20, q30
+
+# A, C, G, T and then everything else (N) as 0-4 for the per cycle base counts
+BASES = "ACGTN"
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for code, base in enumerate("ACGT"):
+    BASE_CODES[ord(base)] = code
+    BASE_CODES[ord(base.lower())] = code
+
+class ReadQC():
+    """Per cycle quality sums, read length counts and per cycle base counts, kept in numpy arrays that only grow when a longer read turns up."""
+
+    def __init__(self, cycles=512):
+        self.length_counts = np.zeros(cycles + 1, dtype=np.int64) # index is the read length
+        self.qual_sums = np.zeros(cycles, dtype=np.int64) # phred+33 values, 33 is taken off per read in to_dict
+        self.base_counts = np.zeros((len(BASES), cycles), dtype=np.int64)
+
+    def grow(self, max_length):
+        cycles = len(self.qual_sums)
+        if max_length > cycles:
+            extra = max_length - cycles
+            self.length_counts = np.pad(self.length_counts, (0, extra))
+            self.qual_sums = np.pad(self.qual_sums, (0, extra))
+            self.base_counts = np.pad(self.base_counts, ((0, 0), (0, extra)))
+
+    def add(self, seqs, quals):
+        """Adds a batch of reads, given as lists of their sequence and quality lines."""
+        lengths = np.fromiter(map(len, quals), dtype=np.int64, count=len(quals))
+        seq_lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+        self.grow(max(lengths.max(), seq_lengths.max()))
+        self.length_counts += np.bincount(lengths, minlength=len(self.length_counts))
+        qual = np.frombuffer(b"".join(quals), dtype=np.uint8)
+        bases = BASE_CODES[np.frombuffer(b"".join(seqs), dtype=np.uint8)]
+        cycles = len(self.qual_sums)
+        same_lengths = np.array_equal(lengths, seq_lengths)
+        if lengths.min() == lengths.max() and same_lengths: # raw reads are usually all the same length, so each cycle is a column
+            length = int(lengths[0])
+            self.qual_sums[:length] += qual.reshape(-1, length).sum(axis=0, dtype=np.int64)
+            for code in range(len(BASES)):
+                self.base_counts[code, :length] += np.count_nonzero(bases.reshape(-1, length) == code, axis=0)
+        else:
+            positions = cycle_positions(lengths)
+            seq_positions = positions if same_lengths else cycle_positions(seq_lengths)
+            self.qual_sums += np.bincount(positions, weights=qual, minlength=cycles).astype(np.int64)
+            self.base_counts += np.bincount(bases.astype(np.int64) * cycles + seq_positions, minlength=len(BASES) * cycles).reshape(len(BASES), cycles)
+
+    def to_dict(self):
+        max_length = int(np.flatnonzero(self.length_counts).max()) if self.length_counts.any() else 0
+        # number of reads that reach each cycle
+        cycle_reads = self.length_counts[::-1].cumsum()[::-1][1:max_length + 1]
+        mean_quality = (self.qual_sums[:max_length] - 33 * cycle_reads) / np.maximum(cycle_reads, 1)
+        return {'reads': int(self.length_counts.sum()), 'max_length': max_length,
+                'mean_quality': [round(float(q), 2) for q in mean_quality],
+                'length_counts': {str(length): int(self.length_counts[length]) for length in np.flatnonzero(self.length_counts)},
+                'base_counts': {base: self.base_counts[code, :max_length].tolist() for code, base in enumerate(BASES)}}
+
+def cycle_positions(lengths):
+    """Position of each base within its read, for reads of these lengths joined together."""
+    return np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+def read_batches(reader, keep_seqs=False):
+    """Yields the name, sequence and quality lines of a fastq.Reader in lists of BATCH_SIZE reads, the last batch has whatever is left.
+    The sequence list is empty unless keep_seqs is True. Names are copied to bytes so they don't hold on to the reader's blocks."""
+    names = []
+    seqs = []
+    quals = []
+    for read in reader: # memoryviews of the read lines, see fastq.Reader.__iter__
+        names.append(bytes(read[0]))
+        if keep_seqs == True:
+            seqs.append(read[1])
+        quals.append(read[3])
+        if len(quals) == BATCH_SIZE:
+            yield names, seqs, quals
+            names = []
+            seqs = []
+            quals = []
+    if len(quals) > 0:
+        yield names, seqs, quals
+
+def new_totals():
+    return {'reads': 0, 'bases': 0, 'q20': 0, 'q30': 0}
+
+def count_batch(totals, qc, seqs, quals):
+    """Adds a batch of reads to the running totals, and to qc if a ReadQC is given. The quality lines are counted together rather than one read at a time."""
+    if len(quals) == 0:
+        return
+    base_count, q20, q30 = batch_stat(quals)
+    totals['reads'] += len(quals)
+    totals['bases'] += base_count
+    totals['q20'] += q20
+    totals['q30'] += q30
+    if qc != None:
+        qc.add(seqs, quals)
+
+def write_qc_json(qc_json, qc):
+    with open(qc_json, 'w') as f:
+        json.dump(qc, f, separators=(',', ':'))
+
+def percent(count, totals):
+    return 100 * float(count)/float(totals['bases'])
+
+def print_stats(totals, file=None):
+    print("total reads:", totals['reads'], file=file)
+    print("total bases:", totals['bases'], file=file)
+    print("q20 bases:", totals['q20'], file=file)
+    print("q30 bases:", totals['q30'], file=file)
+    print("q20 percents:", percent(totals['q20'], totals), file=file)
+    print("q30 percents:", percent(totals['q30'], totals), file=file)
+
+def stat(filename, decompress="gzip", qc_json=None):
+    qc = ReadQC() if qc_json != None else None
+    totals = new_totals()
+    for names, seqs, quals in read_batches(fastq.Reader(filename, decompress), qc != None):
+        count_batch(totals, qc, seqs, quals)
+    print_stats(totals)
+    if qc_json != None:
+        write_qc_json(qc_json, qc.to_dict())
+
+def paired_stat(r1, r2, name, decompress="gzip", fairy_summary=None, busco=False, qc_json=None):
+    """Counts R1 and R2 together and writes <name>_R1_stats.txt, <name>_R2_stats.txt and <name>_raw_read_counts.txt, the same files q30.py and create_raw_stats_output.py made one at a time.
+    If fairy_summary is given the read pairs are checked like fairy.py -r without reading the counts back in.
+    Counting stops at the first read without a matching mate, so the counts of a failed sample only go up to there."""
+    r1_qc, r2_qc = (ReadQC(), ReadQC()) if qc_json != None else (None, None)
+    r1_reader = fastq.Reader(r1, decompress)
+    r2_reader = fastq.Reader(r2, decompress)
+    r1_totals = new_totals()
+    r2_totals = new_totals()
+    pair_error = None
+    # take a batch from each file in turn, with a decompress worker the next block of R1 is inflated while R2 is counted and the other way around.
+    # The reads are checked against their mates as they go, so a sample with mismatched files stops at the first read that doesn't have its mate.
+    for (r1_names, r1_seqs, r1_quals), (r2_names, r2_seqs, r2_quals) in itertools.zip_longest(read_batches(r1_reader, r1_qc != None), read_batches(r2_reader, r2_qc != None), fillvalue=([], [], [])):
+        offset = r1_totals['reads'] # reads before this batch
+        unpaired = fastq.first_unpaired(r1_names, r2_names)
+        if unpaired != None: # only count the reads before the first one without its mate
+            r1_seqs, r1_quals, r2_seqs, r2_quals = r1_seqs[:unpaired], r1_quals[:unpaired], r2_seqs[:unpaired], r2_quals[:unpaired]
+        count_batch(r1_totals, r1_qc, r1_seqs, r1_quals)
+        count_batch(r2_totals, r2_qc, r2_seqs, r2_quals)
+        if unpaired == None:
+            continue
+        if unpaired < min(len(r1_names), len(r2_names)):
+            pair_error = "Read names in R1/R2 don't match at read " + str(offset + unpaired + 1) + " (" + fastq.pair_name(r1_names[unpaired]).decode(errors="replace") + " and " + fastq.pair_name(r2_names[unpaired]).decode(errors="replace") + ")!"
+        else:
+            ended, other = ("R1", "R2") if len(r1_names) < len(r2_names) else ("R2", "R1")
+            pair_error = "The number of reads in R1/R2 are NOT the same! " + ended + " ends after read " + str(offset + unpaired) + " but " + other + " keeps going."
+        break
+    # a read cut off at the end of a file is dropped by the reader, which is what made the counts differ
+    for read, reader in [("R1", r1_reader), ("R2", r2_reader)]:
+        if reader.truncated == True:
+            totals = r1_totals if read == "R1" else r2_totals
+            pair_error = "The number of reads in R1/R2 are NOT the same! " + read + " is truncated part way through read " + str(totals['reads'] + 1) + "."
+    for read, totals in [("R1", r1_totals), ("R2", r2_totals)]:
+        with open(name + "_" + read + "_stats.txt", 'w') as f:
+            print_stats(totals, f)
+    if qc_json != None:
+        write_qc_json(qc_json, {'R1': r1_qc.to_dict(), 'R2': r2_qc.to_dict()})
+    # same 0.XXXX notation create_raw_stats_output.py gets from the printed percents
+    r1_q20_percent, r1_q30_percent, r2_q20_percent, r2_q30_percent = [str(round(percent(totals[q], totals)/100, 4)) for totals in [r1_totals, r2_totals] for q in ['q20', 'q30']]
+    raw_output = name + "_raw_read_counts.txt"
+    create_raw_stats_output.write_raw_stats(r1_totals['reads'], r1_totals['bases'], r1_totals['q20'], r1_q20_percent, r1_totals['q30'], r1_q30_percent, r2_totals['reads'], r2_totals['bases'], r2_totals['q20'], r2_q20_percent, r2_totals['q30'], r2_q30_percent, raw_output, name)
+    if fairy_summary != None:
+        aggr_read_stats = {"R1[reads]": r1_totals['reads'], "R2[reads]": r2_totals['reads'], "R1[bp]": r1_totals['bases'], "R2[bp]": r2_totals['bases'],
+                           "Total_Sequenced_[reads]": r1_totals['reads'] + r2_totals['reads'], "Q30_R1_[%]": r1_q30_percent, "Q30_R2_[%]": r2_q30_percent}
+        fairy.pairs_compare(name, aggr_read_stats, fairy_summary, busco, pair_error)
+    elif pair_error != None:
+        print("Warning: " + pair_error)
 
 def main():
     args = parseArgs()
-    stat(args.input)
+    # the read scan makes nothing with reference cycles, but the batches of memoryviews it holds set off full garbage collections over and over
+    gc.disable()
+    if args.r1 != None or args.r2 != None:
+        if args.r1 == None or args.r2 == None or args.name == None:
+            sys.exit("Error: -1, -2 and -n are all needed to count a pair of fastqs.")
+        paired_stat(args.r1, args.r2, args.name, args.decompress, args.fairy_summary, args.busco, args.qc_json)
+    else:
+        stat(args.input, args.decompress, args.qc_json)
 
 if __name__ == "__main__":
     time1 = time.time()
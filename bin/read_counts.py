@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+## Writes and reads the one row *_raw_read_counts.txt and *_trimmed_read_counts.txt files.
+## Each tsv gets a .json next to it with the same column names and typed values, so later steps (fairy.py, GRiPHin.py) can get at a few numbers without pandas.
+## Files from older runs without the .json are read from the tsv and give back the same types.
+
+import os
+import json
+
+def json_path(stats_file):
+    """<name>_read_counts.txt -> <name>_read_counts.json"""
+    return os.path.splitext(stats_file)[0] + ".json"
+
+def typed(value):
+    """Turns a tsv field into an int or float the way pandas would read it, anything else stays a string."""
+    for number_type in [int, float]:
+        try:
+            return number_type(value)
+        except ValueError:
+            pass
+    return value
+
+def typed_row(columns, values):
+    """Column name to typed value, the sample name is always kept as a string."""
+    return {column: value if column == "Name" else typed(value) for column, value in zip(columns, values)}
+
+def write_counts(output_file, columns, values):
+    """Writes the header and single line of the tsv (no newline at the end, same as before) and the json record of it."""
+    values = [str(value) for value in values]
+    with open(output_file, 'w') as f:
+        f.write('\t'.join(columns) + '\n')
+        f.write('\t'.join(values))
+    with open(json_path(output_file), 'w') as f:
+        json.dump(typed_row(columns, values), f, indent=4)
+
+def read_counts(stats_file):
+    """Returns the row of a *_read_counts.txt file as a dictionary of column name to value, from the .json next to it if there is one."""
+    record_file = json_path(stats_file)
+    if os.path.exists(record_file):
+        with open(record_file, 'r') as f:
+            return json.load(f)
+    with open(stats_file, 'r') as f:
+        columns = f.readline().rstrip("\n").split("\t")
+        values = f.readline().rstrip("\n").split("\t")
+    return typed_row(columns, values)
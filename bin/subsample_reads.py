@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+## Downsamples paired reads to a target coverage of the expected genome size, so very deep isolates don't go through SPAdes at full size.
+## The expected genome size comes from the NCBI assembly stats file (mean total length for the genus and species) or can be given directly.
+## Genus and species come from a .tax file or the kraken2 top hit summary (*.top_kraken_hit.txt).
+## Pairs are kept at random, with a fixed seed so reruns pick the same reads.
+## Usage: >python subsample_reads.py -1 R1.fastq.gz -2 R2.fastq.gz -n sample -s NCBI_Assembly_stats.txt -t sample.tax -c 100
+
+import sys
+import re
+import random
+from itertools import zip_longest
+import shutil
+import argparse
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import fastq
+import fastq
+import read_counts
+
+# Function to get the script version
+def get_version():
+    return "1.0.0"
+
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description='Script to downsample paired reads to a target coverage of the expected genome size.')
+    parser.add_argument('-1', '--r1', dest='r1', required=True, help='R1 fastq file.')
+    parser.add_argument('-2', '--r2', dest='r2', required=True, help='R2 fastq file.')
+    parser.add_argument('-n', '--name', dest='name', required=True, help='Sample name, reads are written to <name>_R1.subsampled.fastq.gz and <name>_R2.subsampled.fastq.gz.')
+    parser.add_argument('-c', '--coverage', dest='coverage', default=100, type=float, required=False, help='Coverage to downsample to. Default is 100.')
+    parser.add_argument('-g', '--genome_size', dest='genome_size', default=None, type=int, required=False, help='Expected genome size in bp, used instead of looking it up in the NCBI assembly stats.')
+    parser.add_argument('-s', '--ncbi_stats', dest='ncbi_stats', default=None, required=False, help='NCBI assembly stats file to look up the expected genome size in.')
+    parser.add_argument('-t', '--tax_file', dest='tax_file', default=None, required=False, help='.tax file from determine_taxID.sh or *.top_kraken_hit.txt with the genus and species to look up.')
+    parser.add_argument('-x', '--taxa', dest='taxa', default=None, required=False, help='"Genus species" to look up, instead of a .tax file.')
+    parser.add_argument('-r', '--read_counts', dest='read_counts', default=None, required=False, help='*_read_counts.txt for the reads given (e.g. *_trimmed_read_counts.txt from GET_TRIMD_STATS for trimmed reads), so they don\'t need to be counted first.')
+    parser.add_argument('-l', '--level', dest='level', default=1, type=int, choices=range(1, 10), required=False, help='gzip compression level of the downsampled reads, they only go on to the next step so the default is the fastest, 1.')
+    parser.add_argument('--seed', dest='seed', default=42, type=int, required=False, help='Seed for picking the reads to keep. Default is 42.')
+    parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
+    return parser.parse_args()
+
+def taxa_name(line):
+    """Name from a G: or s: line, .tax files have it after a tab and top kraken hit files after the percentage ("G: 25.00 Escherichia")."""
+    line = line.rstrip("\n")
+    if "\t" in line:
+        return line.split("\t")[-1].strip()
+    return " ".join(line.split()[2:])
+
+def get_taxa(tax_file):
+    """Returns "Genus species" from the G: and s: lines of a .tax or top kraken hit file, with species named like calculate_assembly_ratio.sh does."""
+    genus = species = ""
+    with open(tax_file, 'r') as f:
+        for line in f:
+            if line.startswith("G:"):
+                genus = taxa_name(line)
+            elif line.startswith("s:"):
+                species = taxa_name(line)
+    if genus == "":
+        genus = "No genus found"
+    if species == "":
+        species = "No species found"
+    elif "sp." in species:
+        # unnamed species are listed as "sp.ABC-123" in the stats file, same as calculate_assembly_ratio.sh
+        species = species.replace("sp. ", "sp.", 1)
+        species = re.sub(r"(sp\.)([a-zA-Z]+)", lambda match: match.group(1) + match.group(2).upper(), species, count=1)
+        species = species.replace(" ", "-")
+    return genus + " " + species
+
+def expected_genome_size(ncbi_stats, taxa):
+    """Mean total length of the species' assemblies in bp from the NCBI assembly stats (5th column is Mb), or None if the species isn't in there.
+    Matched without case like calculate_assembly_ratio.sh."""
+    with open(ncbi_stats, 'r') as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if fields[0].lower() == taxa.lower():
+                return int(1000000 * float(fields[4]))
+    return None
+
+def count_bases(r1, r2):
+    """Total bp in both read files, for when there is no read counts file."""
+    total_bases = 0
+    for fname in [r1, r2]:
+        for read in fastq.Reader(fname, "auto"):
+            total_bases += len(read[1])
+    return total_bases
+
+def subsample(r1, r2, r1_out, r2_out, fraction, seed, level=1):
+    """Streams through both files together keeping each pair with the chance fraction.
+    Returns the number of pairs kept and looked at, and an error if R1 and R2 stop pairing up (same checks as q30.py's paired mode) or None."""
+    picker = random.Random(seed)
+    r1_writer = fastq.Writer(r1_out, level, threaded=True)
+    r2_writer = fastq.Writer(r2_out, level, threaded=True)
+    r1_reader = fastq.Reader(r1, "auto")
+    r2_reader = fastq.Reader(r2, "auto")
+    kept = 0
+    pairs = 0
+    pair_error = None
+    for r1_read, r2_read in zip_longest(r1_reader, r2_reader):
+        if r1_read == None or r2_read == None:
+            ended, going = ("R1", "R2") if r1_read == None else ("R2", "R1")
+            pair_error = "The number of reads in R1/R2 are NOT the same! " + ended + " ends after read " + str(pairs) + " but " + going + " keeps going."
+            break
+        if fastq.first_unpaired([r1_read[0]], [r2_read[0]]) != None:
+            pair_error = "Read names in R1/R2 don't match at read " + str(pairs + 1) + " (" + fastq.pair_name(r1_read[0]).decode(errors="replace") + " and " + fastq.pair_name(r2_read[0]).decode(errors="replace") + ")!"
+            break
+        pairs += 1
+        if picker.random() < fraction:
+            r1_writer.writeRead(*r1_read)
+            r2_writer.writeRead(*r2_read)
+            kept += 1
+    r1_writer.close()
+    r2_writer.close()
+    # a read cut off at the end of a file is dropped by the reader, which is what made the counts differ
+    for read_name, reader in [("R1", r1_reader), ("R2", r2_reader)]:
+        if reader.truncated == True:
+            pair_error = "The number of reads in R1/R2 are NOT the same! " + read_name + " is truncated part way through read " + str(pairs + 1) + "."
+    return kept, pairs, pair_error
+
+def main():
+    args = parseArgs()
+    r1_out = args.name + "_R1.subsampled.fastq.gz"
+    r2_out = args.name + "_R2.subsampled.fastq.gz"
+    genome_size = args.genome_size
+    if genome_size == None:
+        if args.ncbi_stats == None or (args.tax_file == None and args.taxa == None):
+            sys.exit("Error: Give either -g or -s with -t or -x to get the expected genome size.")
+        taxa = args.taxa if args.taxa != None else get_taxa(args.tax_file)
+        genome_size = expected_genome_size(args.ncbi_stats, taxa)
+    if args.read_counts != None:
+        # only the paired bp, Total_Sequenced_[bp] of trimmed reads also has the unpaired reads that aren't downsampled here
+        counts = read_counts.read_counts(args.read_counts)
+        total_bases = int(counts["R1[bp]"]) + int(counts["R2[bp]"])
+    else:
+        total_bases = count_bases(args.r1, args.r2)
+    if genome_size == None or total_bases == 0 or total_bases <= genome_size * args.coverage:
+        if genome_size == None:
+            print("Warning: " + taxa + " isn't in " + args.ncbi_stats + ", reads are not downsampled.")
+        else:
+            print("Reads are at " + str(round(total_bases/genome_size, 2)) + "x, which is under " + str(args.coverage) + "x so they are not downsampled.")
+        # keep the same output names so the next step doesn't have to know
+        if args.r1.endswith(".gz") and args.r2.endswith(".gz"):
+            shutil.copyfile(args.r1, r1_out)
+            shutil.copyfile(args.r2, r2_out)
+        else:
+            kept, pairs, pair_error = subsample(args.r1, args.r2, r1_out, r2_out, 1.0, args.seed, args.level)
+            if pair_error != None:
+                sys.exit("Error: " + pair_error)
+        return
+    fraction = genome_size * args.coverage / total_bases
+    kept, pairs, pair_error = subsample(args.r1, args.r2, r1_out, r2_out, fraction, args.seed, args.level)
+    if pair_error != None:
+        sys.exit("Error: " + pair_error)
+    print("Downsampled from " + str(round(total_bases/genome_size, 2)) + "x to about " + str(args.coverage) + "x, kept " + str(kept) + " of " + str(pairs) + " read pairs.")
+
+if __name__ == '__main__':
+    main()
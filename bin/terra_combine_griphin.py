@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 # importing the required modules
+import sys
 import glob
 import pandas as pd
 import argparse
@@ -9,6 +10,9 @@ from xlsxwriter.utility import xl_rowcol_to_cell
 import re
 from re import search
 from itertools import chain
+#disable cache usage in the Python so __pycache__ isn't formed. If you don't do this using 'nextflow run cdcgov/phoenix...' a second time will causes and error
+sys.dont_write_bytecode = True # needs to be before the import excel_rows
+from excel_rows import write_df_header, write_df_rows
 
 ##Makes a summary Excel file when given a series of griphin xlsx files
 ##Usage: >python terra_combine_griphin.py -o Output_Report.xlsx
@@ -21,6 +25,7 @@ def get_version():
 def parseArgs(args=None):
     parser = argparse.ArgumentParser(description='Script to generate a combined GRiPHin summary excel sheet')
     parser.add_argument('-o', '--out', dest='output_file', required=False, default=None, help='output file name')
+    parser.add_argument('--low_memory', dest="low_memory", default=False, action='store_true', required=False, help='Write the excel file a row at a time with xlsxwriter constant_memory mode, so memory use stays flat for large reports. Default is off.')
     parser.add_argument('--version', action='version', version=get_version())# Add an argument to display the version
     parser.add_argument('files', nargs=argparse.REMAINDER)
     return parser.parse_args()
@@ -103,19 +108,25 @@ def fix_ar_col_order(col_list):
     final_ar_list = list(chain.from_iterable(final_ar_list))
     return final_ar_list
 
-def write_excel(output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db):
+def write_excel(output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db, low_memory=False):
     # exports the dataframe into excel file with specified name.
-    # Create a Pandas Excel writer using XlsxWriter as the engine.
     if output_file != None and output_file != "GRiPHin_Summary.xlsx":#check that its not "GRiPHin_Summary.xlsx"
-        writer = pd.ExcelWriter((output_file + '_GRiPHin_Summary.xlsx'), engine='xlsxwriter')
+        excel_file = output_file + '_GRiPHin_Summary.xlsx'
     else:
-        writer = pd.ExcelWriter(('GRiPHin_Summary.xlsx'), engine='xlsxwriter')
-    # Convert the dataframe to an XlsxWriter Excel object.
-    df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=1)
-    # Get the xlsxwriter workfbook worksheet objects for formating
-    workbook = writer.book
+        excel_file = 'GRiPHin_Summary.xlsx'
     (max_row, max_col) = df.shape # Get the dimensions of the dataframe.
-    worksheet = writer.sheets['Sheet1']
+    if low_memory == True:
+        # constant_memory flushes each row to disk once the next one is started, so everything below has to be written top to bottom
+        workbook = ws.Workbook(excel_file, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Sheet1')
+    else:
+        # Create a Pandas Excel writer using XlsxWriter as the engine.
+        writer = pd.ExcelWriter(excel_file, engine='xlsxwriter')
+        # Convert the dataframe to an XlsxWriter Excel object.
+        df.to_excel(writer, sheet_name='Sheet1', index=False, startrow=1)
+        # Get the xlsxwriter workfbook worksheet objects for formating
+        workbook = writer.book
+        worksheet = writer.sheets['Sheet1']
     # Setting columns to numbers so you can have commas that make it more human readable
     number_comma_format = workbook.add_format({'num_format': '#,##0'})
     # set formating for python 3.7.12
@@ -165,6 +176,8 @@ def write_excel(output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_coun
     worksheet.merge_range(0, qc_max_col, 0, (qc_max_col + ar_gene_count - 1), "Antibiotic Resistance Genes", cell_format_lightgrey)
     worksheet.merge_range(0, (qc_max_col + ar_gene_count), 0 ,(qc_max_col + ar_gene_count + hv_gene_count - 1), "Hypervirulence Genes^^", cell_format_grey)
     worksheet.merge_range(0, (qc_max_col + ar_gene_count + hv_gene_count), 0, (qc_max_col + ar_gene_count + pf_gene_count + hv_gene_count - 1), "Plasmid Incompatibility Replicons^^^", cell_format_darkgrey)
+    if low_memory == True: # column names go in after the merged headers, but before the big 5 genes are colored
+        write_df_header(workbook, worksheet, df, 1)
     # making WGS IDs bold
     bold = workbook.add_format({'bold': True})
     worksheet.set_column('A3:A' + str(max_row + 2), None, bold)
@@ -189,6 +202,8 @@ def write_excel(output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_coun
                 cell = xl_rowcol_to_cell(1, col_adjustment)   # Gets the excel location like A1
                 worksheet.write(cell, column, orange_format)
         column_count = column_count + 1
+    if low_memory == True: # sample rows have to be written before the footers
+        write_df_rows(worksheet, df, 2)
     # Creating footers
     worksheet.write('A' + str(max_row + 4), 'Cells in YELLOW denote isolates outside of ' + str(set_coverage) + '-100X coverage', yellow_format)
     worksheet.write('A' + str(max_row + 5), 'Cells in ORANGE denote “Big 5” carbapenemase gene (i.e., blaKPC, blaNDM, blaOXA-48-like, blaVIM, and blaIMP) or an acquired blaOXA gene, please confirm what AR Lab Network HAI/AR WGS priority these meet.', orange_format_nb)
@@ -206,7 +221,10 @@ def write_excel(output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_coun
     # add autofilter
     worksheet.autofilter(1, 0, max_row, max_col - 1)
     # Close the Pandas Excel writer and output the Excel file.
-    writer.save()
+    if low_memory == True:
+        workbook.close()
+    else:
+        writer.save()
 
 def big5_check(final_ar_df):
     """"Function that will return list of columns to highlight if a sample has a hit for a big 5 gene."""
@@ -316,7 +334,7 @@ def main():
     df = combine_excels(file_list)
     qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, ar_df, pf_db, ar_db, hv_db = get_column_counts(df)
     columns_to_highlight = big5_check(ar_df)
-    write_excel(args.output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db)
+    write_excel(args.output_file, df, set_coverage, phoenix, qc_max_col, ar_gene_count, pf_gene_count, hv_gene_count, columns_to_highlight, ar_df, pf_db, ar_db, hv_db, args.low_memory)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
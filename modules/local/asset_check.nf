@@ -1,23 +1,29 @@
 process ASSET_CHECK {
     label 'process_low'
-    // base_v2.1.0 - MUST manually change below (line 21)!!!
+    // base_v2.1.0 - MUST manually change below (line 27)!!!
     container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
 
     input:
     path(zipped_sketch)
     path(mlst_db_path)
     path(kraken_db)
+    path(ar_db)
 
     output:
-    path('*.msh'),        emit: mash_sketch
-    path("versions.yml"), emit: versions
-    path('db'),           emit: mlst_db
-    path('*_folder'),     emit: kraken_db
+    path('*.msh'),         emit: mash_sketch
+    path("versions.yml"),  emit: versions
+    path('db'),            emit: mlst_db
+    path('*_folder'),      emit: kraken_db
+    path('*.ar_dic.json'), emit: ar_index
 
     when:
     task.ext.when == null || task.ext.when
 
-    script:
+    script: // ktaxonomy.py and ar_dictionary.py are bundled with the pipeline, in cdcgov/phoenix/bin/
+    // Adding if/else for if running on ICA it is a requirement to state where the script is, however, this causes CLI users to not run the pipeline from any directory.
+    if (params.ica==false) { ica = "" }
+    else if (params.ica==true) { ica = "python ${workflow.launchDir}/bin/" }
+    else { error "Please set params.ica to either \"true\" if running on ICA or \"false\" for all other methods." }
     def container_version = "base_v2.1.0"
     def container = task.container.toString() - "quay.io/jvhagey/phoenix@"
     """
@@ -50,8 +56,20 @@ process ASSET_CHECK {
         mv \${folder_name} \${folder_name}_folder
     fi
 
+    # compile ktaxonomy.tsv to arrays once here, so each sample's make_kreport.py loads them rather than parsing the text
+    if [[ -f \${folder_name}_folder/ktaxonomy.tsv ]]
+    then
+        ${ica}ktaxonomy.py -t \${folder_name}_folder/ktaxonomy.tsv
+    fi
+
+    # index the AR database headers once here, GRIPHIN gets the index staged next to the database so it doesn't read the fasta
+    ${ica}ar_dictionary.py -a ${ar_db}
+
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
+        python: \$(python --version | sed 's/Python //g')
+        ktaxonomy.py: \$(${ica}ktaxonomy.py --version )
+        ar_dictionary.py: \$(${ica}ar_dictionary.py --version )
         phoenix_base_container_tag: ${container_version}
         phoenix_base_container: ${container}
     END_VERSIONS
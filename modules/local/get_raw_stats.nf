@@ -1,7 +1,7 @@
 process GET_RAW_STATS {
     tag "${meta.id}"
     label 'process_single'
-    // base_v2.1.0 - MUST manually change below (line 32)!!!
+    // base_v2.1.0 - MUST manually change below (line 35)!!!
     container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
 
     input:
@@ -11,6 +11,8 @@ process GET_RAW_STATS {
     output:
     tuple val(meta), path('*_stats.txt'),                        emit: raw_stats
     tuple val(meta), path('*_raw_read_counts.txt'),              emit: combined_raw_stats
+    tuple val(meta), path('*_raw_read_counts.json'),             emit: combined_raw_stats_json
+    tuple val(meta), path('*_raw_qc.json'),       optional:true, emit: raw_qc
     tuple val(meta), path('*_summary.txt'),                      emit: outcome
     path('*_summaryline.tsv'),                    optional:true, emit: summary_line
     tuple val(meta), path('*_summary_old_2.txt'),                emit: outcome_to_edit
@@ -27,20 +29,17 @@ process GET_RAW_STATS {
     else if (params.ica==true) { ica = "python ${workflow.launchDir}/bin/" }
     else { error "Please set params.ica to either \"true\" if running on ICA or \"false\" for all other methods." }
     // define variables
+    def args = task.ext.args ?: '' // e.g. ext.args = { "-j ${meta.id}_raw_qc.json" } for the raw read QC json, it is off by default as nothing reads it yet
     def prefix = task.ext.prefix ?: "${meta.id}"
     def busco_parameter = busco_val ? "--busco" : ""
     def container_version = "base_v2.1.0"
     def container = task.container.toString() - "quay.io/jvhagey/phoenix@"
     def path_to_bin = "${workflow.launchDir}/bin/"
     """
-    ${ica}q30.py -i ${reads[0]} > ${prefix}_R1_stats.txt
-    ${ica}q30.py -i ${reads[1]} > ${prefix}_R2_stats.txt
-    ${ica}create_raw_stats_output.py -n ${prefix} -r1 ${prefix}_R1_stats.txt -r2 ${prefix}_R2_stats.txt
-
-    ## checking that read counts match before moving on
-
-    # Output check for messages indicating read pairs that do not match
-    ${ica}fairy.py -r ${prefix}_raw_read_counts.txt -f ${fairy_outcome} ${busco_parameter}
+    # counts R1 and R2 together, writes the *_stats.txt and *_raw_read_counts.txt/.json files and
+    ## checks that read counts match before moving on (same as fairy.py -r) all in one go
+    # with -j in ext.args *_raw_qc.json has the per cycle quality, read lengths and per cycle base counts of the raw reads so they don't need a separate FastQC run
+    ${ica}q30.py -1 ${reads[0]} -2 ${reads[1]} -n ${prefix} -f ${fairy_outcome} ${busco_parameter} ${args}
 
     #making a copy of the summary file to pass to BBMAP_REFORMAT to handle file names being the same
     cp ${prefix}_summary.txt ${prefix}_summary_old_2.txt
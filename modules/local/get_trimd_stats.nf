@@ -1,7 +1,7 @@
 process GET_TRIMD_STATS {
     tag "$meta.id"
     label 'process_single'
-    // base_v2.1.0 - MUST manually change below (line 30)!!!
+    // base_v2.1.0 - MUST manually change below (line 31)!!!
     container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
 
     input:
@@ -13,6 +13,7 @@ process GET_TRIMD_STATS {
 
     output:
     tuple val(meta), path('*_trimmed_read_counts.txt'),          emit: fastp_total_qc
+    tuple val(meta), path('*_trimmed_read_counts.json'),         emit: fastp_total_qc_json
     tuple val(meta), path('*_summary.txt'),                      emit: outcome
     path('*_summaryline.tsv'),                    optional:true, emit: summary_line
     tuple val(meta), path('*_summary_old_3.txt'),                emit: outcome_to_edit
@@ -6,6 +6,7 @@ process GRIPHIN {
     path(summary_line_files)
     path(original_samplesheet)
     path(db)
+    path(ar_index) // <db>.ar_dic.json from ASSET_CHECK, staged next to db so GRiPHin.py loads it instead of reading the fasta
     path(outdir) // output directory used as prefix for the summary file
     val(coverage)
     val(entry)
@@ -29,7 +30,7 @@ process GRIPHIN {
     """
     full_path=\$(readlink -f ${outdir})
 
-    ${ica}GRiPHin.py -d \$full_path -a $db --output ${outdir} --coverage ${coverage} ${phoenix} ${scaffolds}
+    ${ica}GRiPHin.py -d \$full_path -a $db --output ${outdir} --coverage ${coverage} --threads ${task.cpus} ${phoenix} ${scaffolds}
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
@@ -0,0 +1,46 @@
+process KREPORT_CONVERT {
+    tag "$meta.id"
+    label 'process_single'
+    // base_v2.1.0 - MUST manually change below (line 24)!!!
+    container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
+
+    input:
+    tuple val(meta), path(kraken_report)
+    val(type) //wtasmbld, trimd or asmbld
+
+    output:
+    tuple val(meta), path('*.krona'),              emit: krona
+    tuple val(meta), path('*.mpa'),                emit: mpa, optional: true
+    tuple val(meta), path('*.top_kraken_hit.txt'), emit: ksummary
+    path("versions.yml"),                          emit: versions
+
+    script: // This script is bundled with the pipeline, in cdcgov/phoenix/bin/
+    // Adding if/else for if running on ICA it is a requirement to state where the script is, however, this causes CLI users to not run the pipeline from any directory.
+    if (params.ica==false) { ica = "" }
+    else if (params.ica==true) { ica = "python ${workflow.launchDir}/bin/" }
+    else { error "Please set params.ica to either \"true\" if running on ICA or \"false\" for all other methods." }
+    // define variables
+    def prefix = task.ext.prefix ?: "${meta.id}"
+    def container_version = "base_v2.1.0"
+    def container = task.container.toString() - "quay.io/jvhagey/phoenix@"
+    // versions.yml has kreport_convert.py in place of krakentools (1.2) and kraken2_best_hit.sh (2.0), its outputs are the same as those gave
+    // no mpa file for the weighted report, its top hit percentages are scaled to unclassified + root
+    def mpa = type == "wtasmbld" ? "" : "--mpa ${prefix}.mpa"
+    def weighted = type == "wtasmbld" ? "--weighted" : ""
+    """
+    # krona text, mpa and top kraken hit from one read of the report
+    ${ica}kreport_convert.py \\
+        --report ${kraken_report} \\
+        --krona ${prefix}_${type}.krona \\
+        --best_hit ${prefix}.kraken2_${type}.top_kraken_hit.txt \\
+        ${mpa} ${weighted}
+
+    cat <<-END_VERSIONS > versions.yml
+    "${task.process}":
+        python: \$(python --version | sed 's/Python //g')
+        kreport_convert.py: \$(${ica}kreport_convert.py --version )
+        phoenix_base_container_tag: ${container_version}
+        phoenix_base_container: ${container}
+    END_VERSIONS
+    """
+}
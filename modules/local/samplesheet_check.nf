@@ -1,7 +1,7 @@
 process SAMPLESHEET_CHECK {
     tag "$samplesheet"
     label 'process_single'
-    // base_v2.1.0 - MUST manually change below (line 20)!!!
+    // base_v2.1.0 - MUST manually change below (line 21)!!!
     container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
 
     input:
@@ -17,12 +17,15 @@ process SAMPLESHEET_CHECK {
     else if (params.ica==true) { ica = "python ${workflow.launchDir}/bin/" }
     else { error "Please set params.ica to either \"true\" if running on ICA or \"false\" for all other methods." }
     // define variables
+    def args = task.ext.args ?: '' // for example '-u' to use fastqs that aren't gzipped as they are, or '-l 1' to gzip them faster
     def container_version = "base_v2.1.0"
     def container = task.container.toString() - "quay.io/jvhagey/phoenix@"
     """
     ${ica}check_samplesheet.py \\
     $samplesheet \\
-    samplesheet.valid.csv
+    samplesheet.valid.csv \\
+    --threads ${task.cpus} \\
+    $args
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
@@ -1,37 +1,38 @@
-process KRAKENTOOLS_KREPORT2MPA {
+process SUBSAMPLE_READS {
     tag "$meta.id"
     label 'process_single'
     // base_v2.1.0 - MUST manually change below (line 23)!!!
     container 'quay.io/jvhagey/phoenix@sha256:f0304fe170ee359efd2073dcdb4666dddb96ea0b79441b1d2cb1ddc794de4943'
 
     input:
-    tuple val(meta), path(kraken_report)
+    tuple val(meta), path(reads), path(read_counts), path(taxa_file) // read_counts of the reads given, taxa_file is the kraken2 trimd top hit or a .tax file
+    path(ncbi_database)
+    val(max_coverage)
 
     output:
-    tuple val(meta), path('*.mpa'), emit: mpa
-    path("versions.yml")          , emit: versions
+    tuple val(meta), path('*.subsampled.fastq.gz'), emit: reads
+    path("versions.yml"),                           emit: versions
 
-    script: // This script is bundled with the pipeline, in phoenix/bin/
+    script: // This script is bundled with the pipeline, in cdcgov/phoenix/bin/
     // Adding if/else for if running on ICA it is a requirement to state where the script is, however, this causes CLI users to not run the pipeline from any directory.
-    if (params.ica==false) { ica = "" } 
+    if (params.ica==false) { ica = "" }
     else if (params.ica==true) { ica = "python ${workflow.launchDir}/bin/" }
     else { error "Please set params.ica to either \"true\" if running on ICA or \"false\" for all other methods." }
     // define variables
     def prefix = task.ext.prefix ?: "${meta.id}"
     def container_version = "base_v2.1.0"
-    def krakentools_version = "1.2"
     def container = task.container.toString() - "quay.io/jvhagey/phoenix@"
     """
-    ${ica}kreport2mpa.py \\
-        --report-file ${kraken_report} \\
-        --output ${prefix}.mpa
+    # downsample reads to max_coverage of the expected genome size for the taxa, reads under that are passed on as they are
+    ${ica}subsample_reads.py -1 ${reads[0]} -2 ${reads[1]} -n ${prefix} -r ${read_counts} -t ${taxa_file} -s ${ncbi_database} -c ${max_coverage}
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
         python: \$(python --version | sed 's/Python //g')
-        krakentools: ${krakentools_version}
+        subsample_reads.py: \$(${ica}subsample_reads.py --version )
+        NCBI_Assembly_Stats_DB: $ncbi_database
         phoenix_base_container_tag: ${container_version}
         phoenix_base_container: ${container}
     END_VERSIONS
     """
-}
\ No newline at end of file
+}
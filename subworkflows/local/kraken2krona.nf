@@ -5,18 +5,13 @@
 include { KRAKEN2_KRAKEN2 as KRAKEN2_TRIMD                  } from '../../modules/local/kraken2'
 include { KRAKEN2_KRAKEN2 as KRAKEN2_ASMBLD                 } from '../../modules/local/kraken2'
 include { KRAKEN2_KRAKEN2 as KRAKEN2_WTASMBLD               } from '../../modules/local/kraken2'
-include { KRAKEN2_KRONA as KREPORT2KRONA_TRIMD              } from '../../modules/local/krakentools_kreport2krona'
-include { KRAKEN2_KRONA as KREPORT2KRONA_ASMBLD             } from '../../modules/local/krakentools_kreport2krona'
-include { KRAKEN2_KRONA as KREPORT2KRONA_WTASMBLD           } from '../../modules/local/krakentools_kreport2krona'
+include { KREPORT_CONVERT as KREPORT_CONVERT_TRIMD          } from '../../modules/local/kreport_convert'
+include { KREPORT_CONVERT as KREPORT_CONVERT_ASMBLD         } from '../../modules/local/kreport_convert'
+include { KREPORT_CONVERT as KREPORT_CONVERT_WTASMBLD       } from '../../modules/local/kreport_convert'
 include { KRONA_KTIMPORTTEXT as KRONA_KTIMPORTTEXT_TRIMD    } from '../../modules/local/ktimporttext'
 include { KRONA_KTIMPORTTEXT as KRONA_KTIMPORTTEXT_ASMBLD   } from '../../modules/local/ktimporttext'
 include { KRONA_KTIMPORTTEXT as KRONA_KTIMPORTTEXT_WTASMBLD } from '../../modules/local/ktimporttext'
-include { KRAKENTOOLS_KREPORT2MPA as KREPORT2MPA_TRIMD      } from '../../modules/local/krakentools_kreport2mpa'
-include { KRAKENTOOLS_KREPORT2MPA as KREPORT2MPA_ASMBLD     } from '../../modules/local/krakentools_kreport2mpa'
 include { KRAKENTOOLS_MAKEKREPORT                           } from '../../modules/local/krakentools_makekreport'
-include { KRAKEN_BEST_HIT as KRAKEN2_BH_TRIMD               } from '../../modules/local/kraken_bh'
-include { KRAKEN_BEST_HIT as KRAKEN2_BH_ASMBLD              } from '../../modules/local/kraken_bh'
-include { KRAKEN_BEST_HIT as KRAKEN2_BH_WTASMBLD            } from '../../modules/local/kraken_bh'
 
 workflow KRAKEN2_WF {
     take:
@@ -54,36 +49,22 @@ workflow KRAKEN2_WF {
         )
         ch_versions = ch_versions.mix(KRAKEN2_TRIMD.out.versions)
 
-        // Create mpa file
-        KREPORT2MPA_TRIMD (
-            KRAKEN2_TRIMD.out.report
-        )
-        ch_versions = ch_versions.mix(KREPORT2MPA_TRIMD.out.versions)
-
-        // Converting kraken report to krona file to have hierarchical output in krona plot
-        KREPORT2KRONA_TRIMD (
+        // Converting kraken report to krona file to have hierarchical output in krona plot, mpa file and kraken best hit in one pass over the report
+        KREPORT_CONVERT_TRIMD (
             KRAKEN2_TRIMD.out.report, "trimd"
         )
-        ch_versions = ch_versions.mix(KREPORT2KRONA_TRIMD.out.versions)
+        ch_versions = ch_versions.mix(KREPORT_CONVERT_TRIMD.out.versions)
 
         // Create krona plot from kraken report
         KRONA_KTIMPORTTEXT_TRIMD (
-            KREPORT2KRONA_TRIMD.out.krona, "trimd"
+            KREPORT_CONVERT_TRIMD.out.krona, "trimd"
         )
         ch_versions = ch_versions.mix(KRONA_KTIMPORTTEXT_TRIMD.out.versions)
 
-        // Combining kraken report with quast report based on meta.id
-        kraken_bh_trimd_ch = KRAKEN2_TRIMD.out.report.map{meta, report         -> [[id:meta.id], report]}\
-        .join(qc_stats.map{                               meta, fastp_total_qc -> [[id:meta.id], fastp_total_qc]}, by: [0])
-
-        // Getting Kraken best hit for assembled data
-        KRAKEN2_BH_TRIMD (
-            kraken_bh_trimd_ch, "trimd"
-        )
-        ch_versions = ch_versions.mix(KRAKEN2_BH_TRIMD.out.versions)
-
         report        = KRAKEN2_TRIMD.out.report
-        k2_bh_summary = KRAKEN2_BH_TRIMD.out.ksummary
+        // Kraken best hit is only passed on for samples with qc stats, keyed by meta.id, same as when it was joined to them before running
+        k2_bh_summary = KREPORT_CONVERT_TRIMD.out.ksummary.map{meta, ksummary -> [[id:meta.id], ksummary]}\
+        .join(qc_stats.map{                                    meta, fastp_total_qc -> [[id:meta.id]]}, by: [0])
         krona_html    = KRONA_KTIMPORTTEXT_TRIMD.out.html
 
     } else if(type =="asmbld") {
@@ -94,35 +75,22 @@ workflow KRAKEN2_WF {
         )
         ch_versions = ch_versions.mix(KRAKEN2_ASMBLD.out.versions)
 
-        // Create mpa file
-        KREPORT2MPA_ASMBLD (
-            KRAKEN2_ASMBLD.out.report
-        )
-        ch_versions = ch_versions.mix(KREPORT2MPA_ASMBLD.out.versions)
-
-        // Converting kraken report to krona file to have hierarchical output in krona plot
-        KREPORT2KRONA_ASMBLD (
+        // Converting kraken report to krona file to have hierarchical output in krona plot, mpa file and kraken best hit in one pass over the report
+        KREPORT_CONVERT_ASMBLD (
             KRAKEN2_ASMBLD.out.report, "asmbld"
         )
-        ch_versions = ch_versions.mix(KREPORT2KRONA_ASMBLD.out.versions)
+        ch_versions = ch_versions.mix(KREPORT_CONVERT_ASMBLD.out.versions)
 
         // Create krona plot from kraken report
         KRONA_KTIMPORTTEXT_ASMBLD (
-            KREPORT2KRONA_ASMBLD.out.krona, "asmbld"
+            KREPORT_CONVERT_ASMBLD.out.krona, "asmbld"
         )
         ch_versions = ch_versions.mix(KRONA_KTIMPORTTEXT_ASMBLD.out.versions)
 
-        kraken_bh_asmbld_ch = KRAKEN2_ASMBLD.out.report.map{meta, report     -> [[id:meta.id], report]}\
-        .join(quast.map{                                    meta, report_tsv -> [[id:meta.id], report_tsv]}, by: [0])
-
-        // Getting Kraken best hit for assembled data
-        KRAKEN2_BH_ASMBLD (
-            kraken_bh_asmbld_ch, "asmbld"
-        )
-        ch_versions = ch_versions.mix(KRAKEN2_BH_ASMBLD.out.versions)
-
         report        = KRAKEN2_ASMBLD.out.report
-        k2_bh_summary = KRAKEN2_BH_ASMBLD.out.ksummary
+        // Kraken best hit is only passed on for samples with a quast report, keyed by meta.id, same as when it was joined to them before running
+        k2_bh_summary = KREPORT_CONVERT_ASMBLD.out.ksummary.map{meta, ksummary -> [[id:meta.id], ksummary]}\
+        .join(quast.map{                                        meta, report_tsv -> [[id:meta.id]]}, by: [0])
         krona_html    = KRONA_KTIMPORTTEXT_ASMBLD.out.html
 
     } else if(type=="wtasmbld") {
@@ -142,29 +110,21 @@ workflow KRAKEN2_WF {
         )
         ch_versions = ch_versions.mix(KRAKENTOOLS_MAKEKREPORT.out.versions)
 
-        // Converting kraken report to krona file to have hierarchical output in krona plot
-        KREPORT2KRONA_WTASMBLD (
+        // Converting kraken report to krona file to have hierarchical output in krona plot and kraken best hit in one pass over the report
+        KREPORT_CONVERT_WTASMBLD (
             KRAKENTOOLS_MAKEKREPORT.out.kraken_weighted_report, "wtasmbld"
         )
-        ch_versions = ch_versions.mix(KREPORT2KRONA_WTASMBLD.out.versions)
-
-        // Combining kraken report with quast report based on meta.id
-        kraken_bh_wtasmbld_ch = KRAKENTOOLS_MAKEKREPORT.out.kraken_weighted_report.map{meta, kraken_weighted_report -> [[id:meta.id], kraken_weighted_report]}\
-        .join(quast.map{                                                               meta, report_tsv             -> [[id:meta.id], report_tsv]}, by: [0])
-
-        // Getting Kraken best hit for assembled data
-        KRAKEN2_BH_WTASMBLD (
-            kraken_bh_wtasmbld_ch, "wtasmbld"
-        )
-        ch_versions = ch_versions.mix(KRAKEN2_BH_WTASMBLD.out.versions)
+        ch_versions = ch_versions.mix(KREPORT_CONVERT_WTASMBLD.out.versions)
 
         KRONA_KTIMPORTTEXT_WTASMBLD (
-            KREPORT2KRONA_WTASMBLD.out.krona, "wtasmbld"
+            KREPORT_CONVERT_WTASMBLD.out.krona, "wtasmbld"
         )
         ch_versions = ch_versions.mix(KRONA_KTIMPORTTEXT_WTASMBLD.out.versions)
 
         report        = KRAKENTOOLS_MAKEKREPORT.out.kraken_weighted_report
-        k2_bh_summary = KRAKEN2_BH_WTASMBLD.out.ksummary
+        // Kraken best hit is only passed on for samples with a quast report, keyed by meta.id, same as when it was joined to them before running
+        k2_bh_summary = KREPORT_CONVERT_WTASMBLD.out.ksummary.map{meta, ksummary -> [[id:meta.id], ksummary]}\
+        .join(quast.map{                                          meta, report_tsv -> [[id:meta.id]]}, by: [0])
         krona_html    = KRONA_KTIMPORTTEXT_WTASMBLD.out.html
 
     } else {
@@ -139,7 +139,7 @@ workflow SCAFFOLDS_EXQC {
 
         //unzip any zipped databases
         ASSET_CHECK (
-            params.zipped_sketch, params.custom_mlstdb, kraken2_db_path
+            params.zipped_sketch, params.custom_mlstdb, kraken2_db_path, params.ardb
         )
         ch_versions = ch_versions.mix(ASSET_CHECK.out.versions)
 
@@ -388,7 +388,7 @@ workflow SCAFFOLDS_EXQC {
         ch_versions = ch_versions.mix(GATHER_SUMMARY_LINES.out.versions)
 
         GRIPHIN (
-            summaries_ch, CREATE_INPUT_CHANNEL.out.valid_samplesheet, params.ardb, outdir_path, params.coverage, false, true
+            summaries_ch, CREATE_INPUT_CHANNEL.out.valid_samplesheet, params.ardb, ASSET_CHECK.out.ar_index, outdir_path, params.coverage, false, true
         )
         ch_versions = ch_versions.mix(GRIPHIN.out.versions)
 
@@ -32,6 +32,7 @@ ch_multiqc_custom_config = params.multiqc_config ? Channel.fromPath(params.multi
 
 include { ASSET_CHECK                    } from '../modules/local/asset_check'
 include { GET_RAW_STATS                  } from '../modules/local/get_raw_stats'
+include { SUBSAMPLE_READS                } from '../modules/local/subsample_reads'
 include { CORRUPTION_CHECK               } from '../modules/local/fairy_corruption_check'
 include { READ_COUNT_CHECK               } from '../modules/local/fairy_read_count_check'
 include { BBDUK                          } from '../modules/local/bbduk'
@@ -115,7 +116,7 @@ workflow PHOENIX_EXTERNAL {
 
         //unzip any zipped databases
         ASSET_CHECK (
-            params.zipped_sketch, params.custom_mlstdb, kraken2_db_path
+            params.zipped_sketch, params.custom_mlstdb, kraken2_db_path, params.ardb
         )
         ch_versions = ch_versions.mix(ASSET_CHECK.out.versions)
 
@@ -183,9 +184,24 @@ workflow PHOENIX_EXTERNAL {
         )
         ch_versions = ch_versions.mix(KRAKEN2_TRIMD.out.versions)
 
+        // Downsample deep samples to --max_coverage of the expected genome size for the kraken2 top hit before assembly, off unless --max_coverage is given
+        if (params.max_coverage) {
+            subsample_ch = FASTP_TRIMD.out.reads.map{                meta, reads           -> [[id:meta.id], reads]}\
+            .join(GET_TRIMD_STATS.out.fastp_total_qc.map{            meta, fastp_total_qc  -> [[id:meta.id], fastp_total_qc]},  by: [0])\
+            .join(KRAKEN2_TRIMD.out.k2_bh_summary.map{               meta, k2_bh_summary   -> [[id:meta.id], k2_bh_summary]},   by: [0])
+
+            SUBSAMPLE_READS (
+                subsample_ch, params.ncbi_assembly_stats, params.max_coverage
+            )
+            ch_versions = ch_versions.mix(SUBSAMPLE_READS.out.versions)
+            assembly_reads_ch = SUBSAMPLE_READS.out.reads
+        } else {
+            assembly_reads_ch = FASTP_TRIMD.out.reads
+        }
+
         SPADES_WF (
             FASTP_SINGLES.out.reads, \
-            FASTP_TRIMD.out.reads, \
+            assembly_reads_ch, \
             GET_TRIMD_STATS.out.fastp_total_qc, \
             GET_RAW_STATS.out.combined_raw_stats, \
             [], \
@@ -428,7 +444,7 @@ workflow PHOENIX_EXTERNAL {
 
         //create GRiPHin report
         GRIPHIN (
-            all_summaries_ch, INPUT_CHECK.out.valid_samplesheet, params.ardb, outdir_path, params.coverage, true, false
+            all_summaries_ch, INPUT_CHECK.out.valid_samplesheet, params.ardb, ASSET_CHECK.out.ar_index, outdir_path, params.coverage, true, false
         )
         ch_versions = ch_versions.mix(GRIPHIN.out.versions)
 